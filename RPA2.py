@@ -1,35 +1,54 @@
 import sys
 import json
 import time
+# Reference point for the --startup-time report
+MODULE_LOAD_STARTED = time.perf_counter()
 import threading
+import os
+import queue
+import shutil
 from datetime import datetime
 from pathlib import Path
-import base64
 from io import BytesIO
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QLineEdit, QListWidget, QComboBox,
-    QGroupBox, QTextEdit, QTabWidget, QMessageBox, QSplitter,
+    QGroupBox, QTextEdit, QPlainTextEdit, QTabWidget, QMessageBox, QSplitter,
     QListWidgetItem, QSpinBox, QCheckBox, QDialog, QDialogButtonBox,
-    QFormLayout, QScrollArea, QFrame
+    QFormLayout, QScrollArea, QFrame, QTableWidget, QTableWidgetItem, QHeaderView, QListView
 )
-from PySide6.QtCore import Qt, QThread, Signal, QTimer, QSize
+from PySide6.QtCore import Qt, QThread, Signal, QTimer, QSize, QAbstractListModel, QModelIndex
 from PySide6.QtGui import QIcon, QFont, QColor, QPixmap, QImage
 from functools import partial
 
-import pyautogui
-from pynput import mouse, keyboard
-from PIL import Image
+from rpa_engine import (
+    LazyModule, ExecutionEngine, EventSink, ProgressBuffer, StepProfiler, WorkflowCancelled, ExcelWriterSession, DRIVER_POOL, DATA_SINK_ACTIONS,
+    is_web_only, find_data_source, source_variable, stream_rows, pyautogui, pd
+)
+from rpa_recording import optimize_recording
+from rpa_storage import (
+    BLOB_STORE, WorkflowStore, screenshot_refs, externalize_screenshots, inline_screenshots
+)
+
+mouse = LazyModule("pynput.mouse")
+keyboard = LazyModule("pynput.keyboard")
+
+# How often buffered execution progress is shown, and how much log is kept
+PROGRESS_INTERVAL_MS = 100
+EXECUTION_LOG_LINES = 5000
+
+# Longest the recorder holds recorded actions before passing them to the UI
+RECORDER_EMIT_INTERVAL = 0.05
+
+# Slowest steps listed in the Execute tab after a profiled run
+HOTSPOT_ROWS = 10
+
+# Replay speeds offered in the Execute tab; 0 replays as fast as possible
+REPLAY_SPEEDS = {"1x": 1.0, "2x": 2.0, "5x": 5.0, "10x": 10.0, "As fast as possible": 0.0}
 
-import pandas as pd
-import openpyxl
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+# Variable holding each worker's rows when a for_each_row over a file is split
+PARALLEL_ROWS_VARIABLE = "parallel_rows"
 
 class ActionDialog(QDialog):
     """Dialog for adding/editing advanced actions"""
@@ -49,9 +68,10 @@ class ActionDialog(QDialog):
         self.type_combo = QComboBox()
         self.type_combo.addItems([
             "click", "mouse_move", "key", "type_text", 
-            "wait", "screenshot", "if_condition", "loop",
+            "wait", "screenshot", "if_condition", "loop", "for_each_row",
             "web_navigate", "web_click", "web_type", "web_extract",  # NEW
-            "excel_read", "excel_write", "csv_read", "csv_write"  # NEW
+            "excel_read", "excel_write", "csv_read", "csv_write",  # NEW
+            "find_image", "click_image", "wait_for_image"
         ])   
         self.type_combo.setCurrentText(self.action_type)
         self.type_combo.currentTextChanged.connect(self.on_type_changed)
@@ -144,6 +164,41 @@ class ActionDialog(QDialog):
             self.loop_count.setRange(1, 1000)
             self.loop_count.setValue(5)
             self.fields_layout.addRow("Iterations:", self.loop_count)
+            
+        elif self.action_type == "for_each_row":
+            self.file_path_input = QLineEdit()
+            self.file_path_input.setPlaceholderText("path/to/file.csv or .xlsx (or leave empty)")
+            self.fields_layout.addRow("Source File:", self.file_path_input)
+            
+            self.sheet_name_input = QLineEdit()
+            self.sheet_name_input.setPlaceholderText("Sheet1 (Excel only)")
+            self.fields_layout.addRow("Sheet Name:", self.sheet_name_input)
+            
+            self.data_var_input = QLineEdit()
+            self.data_var_input.setPlaceholderText("...or variable containing data")
+            self.fields_layout.addRow("Data Variable:", self.data_var_input)
+            
+            self.row_var_input = QLineEdit()
+            self.row_var_input.setText("row")
+            self.row_var_input.setToolTip("Use ${row.column} in nested actions")
+            self.fields_layout.addRow("Row Variable:", self.row_var_input)
+            
+            self.checkpoint_input = QLineEdit()
+            self.checkpoint_input.setPlaceholderText("path/to/checkpoint.json (optional)")
+            self.fields_layout.addRow("Checkpoint File:", self.checkpoint_input)
+            
+            self.result_file_input = QLineEdit()
+            self.result_file_input.setPlaceholderText("path/to/results.csv (optional)")
+            self.fields_layout.addRow("Result File:", self.result_file_input)
+            
+            self.result_vars_input = QLineEdit()
+            self.result_vars_input.setPlaceholderText("Variables to save per row, comma separated")
+            self.fields_layout.addRow("Result Variables:", self.result_vars_input)
+            
+            self.batch_size_spin = QSpinBox()
+            self.batch_size_spin.setRange(1, 100000)
+            self.batch_size_spin.setValue(100)
+            self.fields_layout.addRow("Write/Checkpoint Every (rows):", self.batch_size_spin)
 
         elif self.action_type == "web_navigate":
             self.url_input = QLineEdit()
@@ -198,6 +253,33 @@ class ActionDialog(QDialog):
             self.var_name_input.setPlaceholderText("Variable name")
             self.fields_layout.addRow("Save to Variable:", self.var_name_input)
             
+            self.usecols_input = QLineEdit()
+            self.usecols_input.setPlaceholderText("All columns (or comma separated names)")
+            self.fields_layout.addRow("Columns:", self.usecols_input)
+            
+            self.header_row_spin = QSpinBox()
+            self.header_row_spin.setRange(1, 1000000)
+            self.header_row_spin.setValue(1)
+            self.fields_layout.addRow("Header Row:", self.header_row_spin)
+            
+            self.start_row_spin = QSpinBox()
+            self.start_row_spin.setRange(0, 10000000)
+            self.start_row_spin.setToolTip("Number of data rows below the header to skip")
+            self.fields_layout.addRow("Skip Rows:", self.start_row_spin)
+            
+            self.max_rows_spin = QSpinBox()
+            self.max_rows_spin.setRange(0, 10000000)
+            self.max_rows_spin.setSpecialValueText("All rows")
+            self.fields_layout.addRow("Max Rows:", self.max_rows_spin)
+            
+            self.read_only_check = QCheckBox("Fast read-only mode")
+            self.read_only_check.setChecked(True)
+            self.fields_layout.addRow("", self.read_only_check)
+            
+            self.cache_check = QCheckBox("Cache parsed data until the file changes")
+            self.cache_check.setChecked(True)
+            self.fields_layout.addRow("", self.cache_check)
+            
         elif self.action_type == "excel_write":
             self.file_path_input = QLineEdit()
             self.file_path_input.setPlaceholderText("path/to/file.xlsx")
@@ -211,6 +293,15 @@ class ActionDialog(QDialog):
             self.data_var_input.setPlaceholderText("Variable containing data")
             self.fields_layout.addRow("Data Variable:", self.data_var_input)
             
+            self.write_mode_combo = QComboBox()
+            self.write_mode_combo.addItems(["replace_sheet", "append", "new_workbook"])
+            self.write_mode_combo.setToolTip(
+                "replace_sheet: overwrite this sheet, keep the others\n"
+                "append: add rows below the sheet's existing rows\n"
+                "new_workbook: start the file from scratch"
+            )
+            self.fields_layout.addRow("Mode:", self.write_mode_combo)
+            
         elif self.action_type == "csv_read":
             self.file_path_input = QLineEdit()
             self.file_path_input.setPlaceholderText("path/to/file.csv")
@@ -220,6 +311,20 @@ class ActionDialog(QDialog):
             self.var_name_input.setPlaceholderText("Variable name")
             self.fields_layout.addRow("Save to Variable:", self.var_name_input)
             
+            self.usecols_input = QLineEdit()
+            self.usecols_input.setPlaceholderText("All columns (or comma separated names)")
+            self.fields_layout.addRow("Columns:", self.usecols_input)
+            
+            self.text_dtype_check = QCheckBox("Read all values as text")
+            self.fields_layout.addRow("", self.text_dtype_check)
+            
+            self.chunk_size_spin = QSpinBox()
+            self.chunk_size_spin.setRange(0, 10000000)
+            self.chunk_size_spin.setSingleStep(10000)
+            self.chunk_size_spin.setSpecialValueText("Load whole file")
+            self.chunk_size_spin.setToolTip("Read the file lazily in chunks of this many rows")
+            self.fields_layout.addRow("Chunk Size (rows):", self.chunk_size_spin)
+            
         elif self.action_type == "csv_write":
             self.file_path_input = QLineEdit()
             self.file_path_input.setPlaceholderText("path/to/file.csv")
@@ -228,6 +333,50 @@ class ActionDialog(QDialog):
             self.data_var_input = QLineEdit()
             self.data_var_input.setPlaceholderText("Variable containing data")
             self.fields_layout.addRow("Data Variable:", self.data_var_input)
+            
+            self.append_check = QCheckBox("Append to existing file")
+            self.fields_layout.addRow("", self.append_check)
+            
+        elif self.action_type in ("find_image", "click_image", "wait_for_image"):
+            self.template_input = QLineEdit()
+            self.template_input.setPlaceholderText("path/to/image.png, or a recorded screenshot")
+            self.fields_layout.addRow("Template Image:", self.template_input)
+            
+            self.region_input = QLineEdit()
+            self.region_input.setPlaceholderText("x, y, width, height (empty = whole screen)")
+            self.region_input.setToolTip("Searching a smaller part of the screen is faster")
+            self.fields_layout.addRow("Search Region:", self.region_input)
+            
+            self.confidence_spin = QSpinBox()
+            self.confidence_spin.setRange(50, 100)
+            self.confidence_spin.setValue(90)
+            self.confidence_spin.setSuffix(" %")
+            self.fields_layout.addRow("Confidence:", self.confidence_spin)
+            
+            self.scales_input = QLineEdit()
+            self.scales_input.setText("1.0")
+            self.scales_input.setToolTip(
+                "Template sizes to try, comma separated, e.g. 0.8, 1.0, 1.25 if the display scaling changes"
+            )
+            self.fields_layout.addRow("Scales:", self.scales_input)
+            
+            if self.action_type != "find_image":
+                self.image_timeout_spin = QSpinBox()
+                self.image_timeout_spin.setRange(0, 3600)
+                self.image_timeout_spin.setValue(10)
+                self.fields_layout.addRow("Timeout (s):", self.image_timeout_spin)
+            if self.action_type == "click_image":
+                self.button_combo = QComboBox()
+                self.button_combo.addItems(["left", "right", "middle"])
+                self.fields_layout.addRow("Button:", self.button_combo)
+            else:
+                self.var_name_input = QLineEdit()
+                self.var_name_input.setText("image_match")
+                self.var_name_input.setToolTip(
+                    "Holds the match's x, y, left, top, width, height and score, for text fields of\n"
+                    "later actions (e.g. type ${image_match.x}). To click the image, use Click Image."
+                )
+                self.fields_layout.addRow("Save to Variable:", self.var_name_input)
 
             
     def get_action(self):
@@ -263,6 +412,19 @@ class ActionDialog(QDialog):
         elif self.action_type == "loop":
             action["iterations"] = self.loop_count.value()
             action["actions"] = []  # Nested actions
+            
+        elif self.action_type == "for_each_row":
+            action["file_path"] = self.file_path_input.text()
+            action["sheet_name"] = self.sheet_name_input.text()
+            action["data_variable"] = self.data_var_input.text()
+            action["row_variable"] = self.row_var_input.text() or "row"
+            action["checkpoint_file"] = self.checkpoint_input.text()
+            action["result_file"] = self.result_file_input.text()
+            action["result_variables"] = [
+                name.strip() for name in self.result_vars_input.text().split(",") if name.strip()
+            ]
+            action["batch_size"] = self.batch_size_spin.value()
+            action["actions"] = []  # Nested actions, run once per row
 
         elif self.action_type == "web_navigate":
             action["url"] = self.url_input.text()
@@ -285,26 +447,149 @@ class ActionDialog(QDialog):
             action["file_path"] = self.file_path_input.text()
             action["sheet_name"] = self.sheet_name_input.text()
             action["variable"] = self.var_name_input.text()
+            action["usecols"] = [
+                name.strip() for name in self.usecols_input.text().split(",") if name.strip()
+            ]
+            action["header_row"] = self.header_row_spin.value()
+            action["start_row"] = self.start_row_spin.value()
+            action["max_rows"] = self.max_rows_spin.value()
+            action["read_only"] = self.read_only_check.isChecked()
+            action["cache"] = self.cache_check.isChecked()
             
         elif self.action_type == "excel_write":
             action["file_path"] = self.file_path_input.text()
             action["sheet_name"] = self.sheet_name_input.text()
             action["data_variable"] = self.data_var_input.text()
+            action["mode"] = self.write_mode_combo.currentText()
             
         elif self.action_type == "csv_read":
             action["file_path"] = self.file_path_input.text()
             action["variable"] = self.var_name_input.text()
+            action["usecols"] = [
+                name.strip() for name in self.usecols_input.text().split(",") if name.strip()
+            ]
+            action["dtype"] = "str" if self.text_dtype_check.isChecked() else ""
+            action["chunk_size"] = self.chunk_size_spin.value()
             
         elif self.action_type == "csv_write":
             action["file_path"] = self.file_path_input.text()
             action["data_variable"] = self.data_var_input.text()
+            action["mode"] = "append" if self.append_check.isChecked() else "write"
+            
+        elif self.action_type in ("find_image", "click_image", "wait_for_image"):
+            action["template"] = self.template_input.text().strip()
+            region = [int(value) for value in self.region_input.text().replace(",", " ").split() if value.isdigit()]
+            action["region"] = region if len(region) == 4 else []
+            action["confidence"] = self.confidence_spin.value() / 100.0
+            action["scales"] = [
+                float(value) for value in self.scales_input.text().replace(",", " ").split()
+                if value.replace(".", "", 1).isdigit() and float(value) > 0
+            ] or [1.0]
+            if self.action_type != "find_image":
+                action["timeout"] = self.image_timeout_spin.value()
+            if self.action_type == "click_image":
+                action["button"] = self.button_combo.currentText()
+            else:
+                action["variable"] = self.var_name_input.text() or "image_match"
             
         return action
 
 
+class ActionListModel(QAbstractListModel):
+    """List model over a workflow's actions.
+
+    Rows are formatted by format_action only when a view asks for them,
+    so showing a workflow costs the same whatever its length and
+    scrolling formats just the rows coming into view. The model works on
+    the list given to set_actions(), so changes made through it also
+    change that list.
+    """
+    def __init__(self, format_action, parent=None):
+        super().__init__(parent)
+        self.format_action = format_action
+        self.actions = []
+
+    def set_actions(self, actions):
+        self.beginResetModel()
+        self.actions = actions
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.actions)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        return self.format_action(row + 1, self.actions[row])
+
+    def append_actions(self, actions):
+        """Add actions at the end, as one insert however many there are"""
+        if not actions:
+            return
+        first = len(self.actions)
+        self.beginInsertRows(QModelIndex(), first, first + len(actions) - 1)
+        self.actions.extend(actions)
+        self.endInsertRows()
+
+    def replace_action(self, row, action):
+        self.actions[row] = action
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_action(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.actions[row]
+        self.endRemoveRows()
+        # Rows after it are numbered one lower now
+        if row < len(self.actions):
+            self.dataChanged.emit(self.index(row), self.index(len(self.actions) - 1))
+
+
+class WorkflowPreview(QWidget):
+    """Summary of a saved workflow above a lazily formatted action list"""
+    def __init__(self, format_action, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.summary = QLabel()
+        self.summary.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.summary)
+
+        self.model = ActionListModel(format_action, self)
+        self.view = QListView()
+        # Rows all have one line of text; without this the view measures
+        # every row of the workflow up front
+        self.view.setUniformItemSizes(True)
+        self.view.setModel(self.model)
+        layout.addWidget(self.view)
+
+    def show_workflow(self, entry, workflow):
+        """Show an index entry's summary and its workflow's actions"""
+        summary = f"Name: {entry['name']}\nCreated: {entry['created']}\nActions: {entry['action_count']}"
+        types = entry.get("action_types")
+        if types:
+            summary += " (" + ", ".join(f"{count} {action_type}" for action_type, count in types.items()) + ")"
+        self.summary.setText(summary)
+        self.model.set_actions(workflow["actions"])
+        self.view.scrollToTop()
+
+    def clear(self):
+        self.summary.clear()
+        self.model.set_actions([])
+
+
 class RecorderThread(QThread):
-    """Thread for recording user actions"""
-    action_recorded = Signal(dict)
+    """Thread for recording user actions.
+
+    The pynput callbacks run inside the OS input hook, so they only put a
+    compact (monotonic_ns, kind, x, y, key) tuple on a queue. This thread
+    turns the tuples into actions - timestamps, screenshots and their PNG
+    encoding included - and emits them in batches of at most
+    RECORDER_EMIT_INTERVAL seconds' worth.
+    """
+    actions_recorded = Signal(list)
     
     def __init__(self):
         super().__init__()
@@ -314,301 +599,408 @@ class RecorderThread(QThread):
         self.mouse_listener = None
         self.keyboard_listener = None
         self.last_move_time = 0
+        self.events = queue.SimpleQueue()
+        # Wall clock and monotonic clock read together, to date events
+        self.clock_origin = (0, 0)
         
     def run(self):
+        events = self.events
+        
         def on_click(x, y, button, pressed):
             if self.recording and pressed:
-                action = {
-                    "type": "click",
-                    "x": x,
-                    "y": y,
-                    "button": str(button).split('.')[-1],
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                # Capture screenshot if enabled
-                if self.capture_screenshots:
-                    try:
-                        screenshot = pyautogui.screenshot(region=(x-50, y-50, 100, 100))
-                        buffer = BytesIO()
-                        screenshot.save(buffer, format='PNG')
-                        action["screenshot"] = base64.b64encode(buffer.getvalue()).decode()
-                    except:
-                        pass
-                        
-                self.action_recorded.emit(action)
+                events.put((time.monotonic_ns(), "click", x, y, button))
                 
         def on_move(x, y):
             if self.recording and self.capture_movement:
-                current_time = time.time()
-                # Only record movement every 0.5 seconds to avoid spam
-                if current_time - self.last_move_time > 0.5:
-                    action = {
-                        "type": "mouse_move",
-                        "x": x,
-                        "y": y,
-                        "duration": 0.5,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    self.action_recorded.emit(action)
-                    self.last_move_time = current_time
+                events.put((time.monotonic_ns(), "mouse_move", x, y, None))
                 
         def on_key(key):
             if self.recording:
-                try:
-                    key_str = key.char
-                except AttributeError:
-                    key_str = str(key).replace('Key.', '')
-                    
-                action = {
-                    "type": "key",
-                    "key": key_str,
-                    "timestamp": datetime.now().isoformat()
-                }
-                self.action_recorded.emit(action)
+                events.put((time.monotonic_ns(), "key", 0, 0, key))
                 
+        self.clock_origin = (time.time_ns(), time.monotonic_ns())
+        self.last_move_time = 0
         self.mouse_listener = mouse.Listener(on_click=on_click, on_move=on_move)
         self.keyboard_listener = keyboard.Listener(on_press=on_key)
         
         self.mouse_listener.start()
         self.keyboard_listener.start()
         
-        self.mouse_listener.join()
+        self.process_events()
+        
+    def process_events(self):
+        """Turn queued events into actions until stop_recording() is called"""
+        running = True
+        while running:
+            batch = []
+            deadline = time.monotonic() + RECORDER_EMIT_INTERVAL
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = self.events.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if event is None:
+                    running = False
+                    break
+                action = self.make_action(*event)
+                if action is not None:
+                    batch.append(action)
+            if batch:
+                self.actions_recorded.emit(batch)
+                
+    def make_action(self, ns, kind, x, y, key):
+        """Action for a queued event, or None if it isn't recorded"""
+        if kind == "mouse_move":
+            # Only record movement every 0.5 seconds to avoid spam
+            if ns - self.last_move_time <= 500_000_000:
+                return None
+            self.last_move_time = ns
+            
+        wall_ns, monotonic_ns = self.clock_origin
+        timestamp = datetime.fromtimestamp((wall_ns + ns - monotonic_ns) / 1e9).isoformat()
+        
+        if kind == "click":
+            action = {
+                "type": "click",
+                "x": x,
+                "y": y,
+                "button": str(key).split('.')[-1],
+                "timestamp": timestamp
+            }
+            
+            # Capture screenshot if enabled
+            if self.capture_screenshots:
+                try:
+                    screenshot = pyautogui.screenshot(region=(x-50, y-50, 100, 100))
+                    buffer = BytesIO()
+                    screenshot.save(buffer, format='PNG')
+                    action["screenshot_blob"] = BLOB_STORE.put(buffer.getvalue())
+                except:
+                    pass
+            return action
+            
+        if kind == "mouse_move":
+            return {
+                "type": "mouse_move",
+                "x": x,
+                "y": y,
+                "duration": 0.5,
+                "timestamp": timestamp
+            }
+            
+        try:
+            key_str = key.char
+        except AttributeError:
+            key_str = str(key).replace('Key.', '')
+        return {
+            "type": "key",
+            "key": key_str,
+            "timestamp": timestamp
+        }
         
     def start_recording(self, capture_movement=False, capture_screenshots=False):
         self.recording = True
         self.capture_movement = capture_movement
         self.capture_screenshots = capture_screenshots
         if not self.isRunning():
+            self.events = queue.SimpleQueue()
             self.start()
             
     def stop_recording(self):
+        """Stop listening; queued events are still emitted before the thread finishes"""
         self.recording = False
         if self.mouse_listener:
             self.mouse_listener.stop()
         if self.keyboard_listener:
             self.keyboard_listener.stop()
+        self.events.put(None)
+
+
+class ExecutorThread(QThread, EventSink):
+    """Thread for executing workflows.
 
+    Runs an ExecutionEngine with itself as the event sink. Progress goes
+    to a ProgressBuffer that the UI polls, so busy workflows don't flood
+    the UI thread with one signal per step; screenshots and the result
+    are re-emitted as Qt signals. Worker threads of a parallel run share
+    their parent's buffer and tag their messages with prefix.
 
-class ExecutorThread(QThread):
-    """Thread for executing workflows"""
-    progress_update = Signal(str)
+    cancel(), pause() and resume() are safe to call from the UI thread.
+    """
     execution_complete = Signal(bool, str)
     screenshot_captured = Signal(QPixmap)
     
-    def __init__(self, workflow, delay=0.5):
+    def __init__(self, workflow, delay=0.5, adaptive_pacing=True, headless=False, variables=None,
+                 progress=None, prefix="", profile=False, replay_speed=None):
+        super().__init__()
+        self.progress = progress or ProgressBuffer()
+        self.prefix = prefix
+        self.engine = ExecutionEngine(
+            workflow, delay, adaptive_pacing, headless, variables, sink=self, profile=profile,
+            replay_speed=replay_speed
+        )
+        self.profiler = self.engine.profiler
+        
+    def run(self):
+        self.engine.run()
+        
+    def cancel(self):
+        self.engine.cancel()
+        
+    def pause(self):
+        self.engine.pause()
+        
+    def resume(self):
+        self.engine.resume()
+        
+    def on_step(self, label):
+        self.progress.on_step(self.prefix + label)
+        
+    def on_progress(self, message):
+        self.progress.on_progress(self.prefix + message)
+        
+    def on_screenshot(self, path):
+        self.screenshot_captured.emit(QPixmap(path))
+        
+    def on_complete(self, success, message):
+        self.execution_complete.emit(success, message)
+
+
+class ParallelExecutorThread(QThread):
+    """Runs a web/data-only workflow across several headless browsers.
+
+    The workflow's first CSV/Excel read, or top-level for_each_row over a
+    file, is read once, its rows are split into one contiguous shard per
+    worker, and each worker ExecutorThread runs the rest of the workflow
+    on its shard with its own driver; a split for_each_row loops over its
+    shard through data_variable instead of the file. Files written by the
+    workers go to per-shard part files which are merged back into the
+    target file, in shard order, when all workers are done. With profile,
+    the workers' step timings are merged into one profiler; step numbers
+    are those of the workflow without the split source read.
+    """
+    execution_complete = Signal(bool, str)
+
+    def __init__(self, workflow, delay=0.5, adaptive_pacing=True, workers=2, loop_count=1, profile=False):
         super().__init__()
         self.workflow = workflow
         self.delay = delay
-        self.variables = {}
-        self.driver = None
-        
+        self.adaptive_pacing = adaptive_pacing
+        self.workers = workers
+        self.loop_count = loop_count
+        self.results = {}
+        self.progress = ProgressBuffer()
+        # Engines of the source read and the workers, for cancel/pause
+        self.engines = []
+        self.cancelled = False
+        self.paused = False
+        self.profiler = StepProfiler() if profile else None
+
     def run(self):
         try:
             actions = self.workflow.get("actions", [])
-            self.execute_actions(actions)
-            self.execution_complete.emit(True, "Workflow completed successfully!")
-            
+            source_index, source = find_data_source(actions)
+            if source is None:
+                raise ValueError("Parallel execution needs one CSV or Excel source to split")
+            if source["type"] == "for_each_row":
+                variable = source.get("data_variable") or PARALLEL_ROWS_VARIABLE
+                looped = dict(source, file_path="", data_variable=variable, start_row=0)
+                remaining = actions[:source_index] + [looped] + actions[source_index + 1:]
+            else:
+                variable = source_variable(source)
+                remaining = actions[:source_index] + actions[source_index + 1:]
+
+            data = self.read_source(source)
+            total = len(data)
+            worker_count = max(1, min(self.workers, total))
+            self.progress.on_progress(f"Splitting {total} rows across {worker_count} browsers")
+
+            outputs = {}
+            workers = []
+            for k in range(worker_count):
+                shard = data.iloc[total * k // worker_count:total * (k + 1) // worker_count]
+                shard = shard.reset_index(drop=True)
+                worker_actions = self.shard_actions(remaining, k, outputs)
+                if self.loop_count > 1:
+                    worker_actions = [{
+                        "type": "loop",
+                        "iterations": self.loop_count,
+                        "actions": worker_actions
+                    }]
+                worker = ExecutorThread(
+                    {"name": self.workflow.get("name", ""), "actions": worker_actions},
+                    self.delay,
+                    self.adaptive_pacing,
+                    headless=True,
+                    variables={variable: shard},
+                    progress=self.progress,
+                    prefix=f"[browser {k+1}] ",
+                    profile=self.profiler is not None
+                )
+                self.track(worker.engine)
+                worker.execution_complete.connect(partial(self.on_worker_complete, k), Qt.DirectConnection)
+                workers.append(worker)
+
+            # Parts left by a crashed run would be appended to and merged
+            for _, parts in outputs.values():
+                for part in parts:
+                    Path(part).unlink(missing_ok=True)
+
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.wait()
+                if self.profiler is not None:
+                    self.profiler.merge(worker.profiler)
+
+            self.merge_outputs(outputs)
+
+            if self.cancelled:
+                raise WorkflowCancelled()
+            failed = [k for k in range(worker_count) if not self.results.get(k, (False, ""))[0]]
+            if failed:
+                details = "; ".join(f"worker {k+1}: {self.results.get(k, (False, 'no result'))[1]}" for k in failed)
+                self.execution_complete.emit(False, f"Error: {len(failed)} of {worker_count} workers failed ({details})")
+            else:
+                self.execution_complete.emit(True, f"Workflow completed successfully on {worker_count} browsers!")
+
+        except WorkflowCancelled:
+            self.execution_complete.emit(False, "Execution stopped by user")
         except Exception as e:
             self.execution_complete.emit(False, f"Error: {str(e)}")
-        finally:
-            self.cleanup_selenium()  # ADD THIS
-            
-    def execute_actions(self, actions, loop_count=1):
-        """Execute a list of actions"""
-        for iteration in range(loop_count):
-            for i, action in enumerate(actions):
-                action_type = action["type"]
-                
-                self.progress_update.emit(
-                    f"Executing step {i+1}/{len(actions)}: {action_type}"
-                )
-                
-                if action_type == "click":
-                    pyautogui.click(action["x"], action["y"], button=action.get("button", "left"))
-                    
-                elif action_type == "mouse_move":
-                    duration = action.get("duration", 0.5)
-                    pyautogui.moveTo(action["x"], action["y"], duration=duration)
-                    
-                elif action_type == "key":
-                    try:
-                        pyautogui.press(action["key"])
-                    except:
-                        pyautogui.write(action["key"])
-                        
-                elif action_type == "type_text":
-                    interval = action.get("interval", 0.01)
-                    pyautogui.write(action["text"], interval=interval)
-                    
-                elif action_type == "wait":
-                    wait_time = action.get("duration", 2)
-                    self.progress_update.emit(f"Waiting {wait_time} seconds...")
-                    time.sleep(wait_time)
-                    
-                elif action_type == "screenshot":
-                    screenshot = pyautogui.screenshot()
-                    # Convert PIL Image to QPixmap
-                    screenshot.save("temp_screenshot.png")
-                    pixmap = QPixmap("temp_screenshot.png")
-                    self.screenshot_captured.emit(pixmap)
-                    
-                elif action_type == "if_condition":
-                    # Simple condition evaluation (can be expanded)
-                    condition = action.get("condition", "")
-                    # For safety, we'll skip complex evaluation
-                    self.progress_update.emit(f"Condition check: {condition}")
-                    
-                elif action_type == "loop":
-                    iterations = action.get("iterations", 1)
-                    nested_actions = action.get("actions", [])
-                    self.progress_update.emit(f"Starting loop: {iterations} iterations")
-                    self.execute_actions(nested_actions, iterations)
-
-                elif action_type == "web_navigate":
-                    self.setup_selenium()
-                    if self.driver:
-                        url = action.get("url", "")
-                        self.progress_update.emit(f"Navigating to {url}")
-                        self.driver.get(url)
-                        
-                elif action_type == "web_click":
-                    if self.driver:
-                        selector_type = action.get("selector_type", "id")
-                        selector = action.get("selector", "")
-                        
-                        by_type = {
-                            "id": By.ID,
-                            "name": By.NAME,
-                            "xpath": By.XPATH,
-                            "css": By.CSS_SELECTOR,
-                            "class": By.CLASS_NAME
-                        }.get(selector_type, By.ID)
-                        
-                        try:
-                            element = WebDriverWait(self.driver, 10).until(
-                                EC.element_to_be_clickable((by_type, selector))
-                            )
-                            element.click()
-                            self.progress_update.emit(f"Clicked element: {selector}")
-                        except TimeoutException:
-                            self.progress_update.emit(f"Element not found: {selector}")
-                            
-                elif action_type == "web_type":
-                    if self.driver:
-                        selector_type = action.get("selector_type", "id")
-                        selector = action.get("selector", "")
-                        text = action.get("text", "")
-                        
-                        by_type = {
-                            "id": By.ID,
-                            "name": By.NAME,
-                            "xpath": By.XPATH,
-                            "css": By.CSS_SELECTOR,
-                            "class": By.CLASS_NAME
-                        }.get(selector_type, By.ID)
-                        
-                        try:
-                            element = WebDriverWait(self.driver, 10).until(
-                                EC.presence_of_element_located((by_type, selector))
-                            )
-                            element.clear()
-                            element.send_keys(text)
-                            self.progress_update.emit(f"Typed into element: {selector}")
-                        except TimeoutException:
-                            self.progress_update.emit(f"Element not found: {selector}")
-                            
-                elif action_type == "web_extract":
-                    if self.driver:
-                        selector_type = action.get("selector_type", "id")
-                        selector = action.get("selector", "")
-                        var_name = action.get("variable", "extracted_data")
-                        
-                        by_type = {
-                            "id": By.ID,
-                            "name": By.NAME,
-                            "xpath": By.XPATH,
-                            "css": By.CSS_SELECTOR,
-                            "class": By.CLASS_NAME
-                        }.get(selector_type, By.ID)
-                        
-                        try:
-                            element = WebDriverWait(self.driver, 10).until(
-                                EC.presence_of_element_located((by_type, selector))
-                            )
-                            self.variables[var_name] = element.text
-                            self.progress_update.emit(f"Extracted data to variable: {var_name}")
-                        except TimeoutException:
-                            self.progress_update.emit(f"Element not found: {selector}")
-                            
-                elif action_type == "excel_read":
-                    file_path = action.get("file_path", "")
-                    sheet_name = action.get("sheet_name", "Sheet1")
-                    var_name = action.get("variable", "excel_data")
-                    
-                    try:
-                        df = pd.read_excel(file_path, sheet_name=sheet_name)
-                        self.variables[var_name] = df
-                        self.progress_update.emit(f"Read Excel file: {file_path}")
-                    except Exception as e:
-                        self.progress_update.emit(f"Error reading Excel: {str(e)}")
-                        
-                elif action_type == "excel_write":
-                    file_path = action.get("file_path", "")
-                    sheet_name = action.get("sheet_name", "Sheet1")
-                    data_var = action.get("data_variable", "")
-                    
-                    if data_var in self.variables:
-                        try:
-                            df = self.variables[data_var]
-                            df.to_excel(file_path, sheet_name=sheet_name, index=False)
-                            self.progress_update.emit(f"Wrote Excel file: {file_path}")
-                        except Exception as e:
-                            self.progress_update.emit(f"Error writing Excel: {str(e)}")
-                    else:
-                        self.progress_update.emit(f"Variable not found: {data_var}")
-                        
-                elif action_type == "csv_read":
-                    file_path = action.get("file_path", "")
-                    var_name = action.get("variable", "csv_data")
-                    
-                    try:
-                        df = pd.read_csv(file_path)
-                        self.variables[var_name] = df
-                        self.progress_update.emit(f"Read CSV file: {file_path}")
-                    except Exception as e:
-                        self.progress_update.emit(f"Error reading CSV: {str(e)}")
-                        
-                elif action_type == "csv_write":
-                    file_path = action.get("file_path", "")
-                    data_var = action.get("data_variable", "")
-                    
-                    if data_var in self.variables:
-                        try:
-                            df = self.variables[data_var]
-                            df.to_csv(file_path, index=False)
-                            self.progress_update.emit(f"Wrote CSV file: {file_path}")
-                        except Exception as e:
-                            self.progress_update.emit(f"Error writing CSV: {str(e)}")
-                    else:
-                        self.progress_update.emit(f"Variable not found: {data_var}")
- 
-                time.sleep(self.delay)
-                
-    def setup_selenium(self):
-        """Initialize Selenium WebDriver"""
-        if not self.driver:
+
+    def read_source(self, source):
+        """Run the data source action once and return the loaded DataFrame"""
+        if source["type"] == "for_each_row":
+            # Same values the loop would have read from the file, from its start row
+            rows = stream_rows(source["file_path"], source.get("sheet_name", ""), int(source.get("start_row", 0)))
             try:
-                self.driver = webdriver.Chrome()  # or webdriver.Firefox()
-            except:
-                # Fallback to other browsers or show error
-                pass
-                
-    def cleanup_selenium(self):
-        """Close Selenium WebDriver"""
-        if self.driver:
-            self.driver.quit()
-            self.driver = None
+                return pd.DataFrame(list(rows), dtype=object)
+            finally:
+                rows.close()
+        # Shards are split by row count, so the source is loaded whole
+        source = dict(source, chunk_size=0)
+        reader = self.track(ExecutionEngine({"actions": [source]}, 0, sink=self.progress))
+        reader.execute_actions([source])
+        data = reader.variables.get(source_variable(source))
+        if data is None:
+            raise ValueError(f"Could not read input data from {source.get('file_path', '')}")
+        return data
+
+    def track(self, engine):
+        """Register engine for cancel/pause, applying any already requested"""
+        self.engines.append(engine)
+        if self.paused:
+            engine.pause()
+        if self.cancelled:
+            engine.cancel()
+        return engine
+
+    def cancel(self):
+        self.cancelled = True
+        for engine in self.engines:
+            engine.cancel()
+
+    def pause(self):
+        self.paused = True
+        for engine in self.engines:
+            engine.pause()
+
+    def resume(self):
+        self.paused = False
+        for engine in self.engines:
+            engine.resume()
+
+    def shard_actions(self, actions, k, outputs):
+        """Copy actions for worker k, redirecting file writes to part files"""
+        sharded = []
+        for action in actions:
+            action = dict(action)
+            if action.get("type") in DATA_SINK_ACTIONS and action.get("file_path"):
+                action["file_path"] = self.part_path(action["file_path"], k, action, outputs)
+            if action.get("type") == "for_each_row":
+                if action.get("result_file"):
+                    # for_each_row appends its results to the file
+                    merge_as = {"type": "csv_write", "mode": "append"}
+                    action["result_file"] = self.part_path(action["result_file"], k, merge_as, outputs)
+                if action.get("checkpoint_file"):
+                    action["checkpoint_file"] = self.part_path(action["checkpoint_file"], k)
+            if "actions" in action:
+                action["actions"] = self.shard_actions(action["actions"], k, outputs)
+            sharded.append(action)
+        return sharded
+
+    def part_path(self, file_path, k, merge_as=None, outputs=None):
+        """Per-worker file name for file_path, registered for merging if merge_as is given"""
+        target = Path(file_path)
+        part = str(target.with_name(f"{target.stem}.part{k+1}{target.suffix}"))
+        if merge_as is not None:
+            parts = outputs.setdefault(str(target), (merge_as, []))[1]
+            if part not in parts:
+                parts.append(part)
+        return part
+
+    def merge_outputs(self, outputs):
+        """Concatenate each target's part files into the target, in shard order"""
+        for target, (action, parts) in outputs.items():
+            existing = [part for part in parts if Path(part).exists()]
+            if not existing:
+                continue
+            if action["type"] == "csv_write":
+                self.merge_csv(target, existing, append=action.get("mode") == "append")
+            else:
+                self.merge_excel(target, existing, action.get("mode", "replace_sheet"))
+            for part in existing:
+                Path(part).unlink()
+            self.progress.on_progress(f"Merged {len(existing)} parts into {target}")
+
+    @staticmethod
+    def merge_csv(target, parts, append):
+        """Join CSV part files as text, keeping only the first header.
+
+        The rows are copied as written, so values such as leading zeros
+        are not re-parsed. With append, the rows go after those already
+        in target and its header is kept.
+        """
+        target = Path(target)
+        header = not (append and target.exists() and target.stat().st_size > 0)
+        with open(target, 'ab' if append else 'wb') as out:
+            if not header:
+                with open(target, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        out.write(b"\n")
+            for part in parts:
+                with open(part, 'rb') as f:
+                    first = f.readline()
+                    if header:
+                        out.write(first)
+                        header = False
+                    shutil.copyfileobj(f, out)
+
+    @staticmethod
+    def merge_excel(target, parts, mode):
+        """Write the parts' sheets into target with the excel_write mode.
+
+        Only the sheets the workers wrote are replaced or appended to;
+        the target's other sheets are kept unless mode is new_workbook.
+        """
+        sheets = {}
+        for part in parts:
+            for sheet_name, frame in pd.read_excel(part, sheet_name=None, dtype=object).items():
+                sheets.setdefault(sheet_name, []).append(frame)
+        session = ExcelWriterSession(target, fresh=mode == "new_workbook")
+        for sheet_name, frames in sheets.items():
+            session.write(pd.concat(frames, ignore_index=True), sheet_name, mode)
+        session.save()
+
+    def on_worker_complete(self, k, success, message):
+        self.results[k] = (success, message)
+        self.progress.on_progress(f"[browser {k+1}] {message}")
+
 
 class RPAMainWindow(QMainWindow):
     def __init__(self):
@@ -617,12 +1009,26 @@ class RPAMainWindow(QMainWindow):
         self.current_actions = []
         self.recorder_thread = RecorderThread()
         self.executor_thread = None
+        self.last_profile = None
+        # workflows.json is only read to migrate libraries from older versions
         self.workflows_file = Path("workflows.json")
+        self.workflow_store = WorkflowStore(Path("workflows"))
         
         self.init_ui()
         self.load_workflows()
         
-        self.recorder_thread.action_recorded.connect(self.on_action_recorded)
+        self.recorder_thread.actions_recorded.connect(self.on_actions_recorded)
+        self.recorder_thread.finished.connect(self.on_recording_finished)
+        
+        # Quit browsers that have sat unused in the pool for too long
+        self.driver_eviction_timer = QTimer(self)
+        self.driver_eviction_timer.timeout.connect(DRIVER_POOL.evict_idle)
+        self.driver_eviction_timer.start(60 * 1000)
+        
+        # Shows what the running executor has buffered since the last tick
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(PROGRESS_INTERVAL_MS)
+        self.progress_timer.timeout.connect(self.flush_execution_progress)
         
     def init_ui(self):
         self.setWindowTitle("Advanced RPA Automation Tool")
@@ -771,6 +1177,20 @@ class RPAMainWindow(QMainWindow):
         self.capture_screenshots_check.setToolTip("Take screenshots at click locations for visual reference")
         options_layout.addWidget(self.capture_screenshots_check)
         
+        self.optimize_recording_check = QCheckBox("Optimize recording when stopped")
+        self.optimize_recording_check.setChecked(True)
+        self.optimize_recording_check.setToolTip(
+            "Merge typed keys into text, simplify mouse paths and drop steps that do nothing"
+        )
+        options_layout.addWidget(self.optimize_recording_check)
+        
+        self.counter_only_check = QCheckBox("Only count actions while recording")
+        self.counter_only_check.setToolTip(
+            "List the recorded actions when recording stops instead of as they arrive "
+            "(for long recordings, e.g. with mouse movements)"
+        )
+        options_layout.addWidget(self.counter_only_check)
+        
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
         
@@ -804,8 +1224,14 @@ class RPAMainWindow(QMainWindow):
         actions_group = QGroupBox("Recorded Actions")
         actions_layout = QVBoxLayout()
         
-        self.actions_list = QListWidget()
+        self.action_model = ActionListModel(self.format_action_text, self)
+        self.action_model.set_actions(self.current_actions)
+        self.actions_list = QListView()
+        self.actions_list.setUniformItemSizes(True)
+        self.actions_list.setModel(self.action_model)
         self.actions_list.setStyleSheet("font-family: monospace;")
+        self.actions_list.setToolTip("Double-click a click action to view its screenshot")
+        self.actions_list.doubleClicked.connect(self.show_action_screenshot)
         actions_layout.addWidget(self.actions_list)
         
         # Action management buttons
@@ -823,6 +1249,16 @@ class RPAMainWindow(QMainWindow):
         delete_action_btn.clicked.connect(self.delete_action)
         action_buttons.addWidget(delete_action_btn)
         
+        image_click_btn = QPushButton("🖼️ Click by Image")
+        image_click_btn.setToolTip("Turn the selected click into a click on its screenshot, wherever it appears")
+        image_click_btn.clicked.connect(self.convert_to_image_click)
+        action_buttons.addWidget(image_click_btn)
+        
+        optimize_btn = QPushButton("⚡ Optimize")
+        optimize_btn.setToolTip("Merge typed keys into text, simplify mouse paths and drop steps that do nothing")
+        optimize_btn.clicked.connect(self.optimize_actions)
+        action_buttons.addWidget(optimize_btn)
+        
         clear_btn = QPushButton("Clear All")
         clear_btn.clicked.connect(self.clear_actions)
         action_buttons.addWidget(clear_btn)
@@ -869,8 +1305,7 @@ class RPAMainWindow(QMainWindow):
         details_group = QGroupBox("Workflow Details")
         details_layout = QVBoxLayout()
         
-        self.workflow_details = QTextEdit()
-        self.workflow_details.setReadOnly(True)
+        self.workflow_details = WorkflowPreview(self.format_action_text)
         self.workflow_details.setMaximumHeight(150)
         details_layout.addWidget(self.workflow_details)
         
@@ -891,6 +1326,47 @@ class RPAMainWindow(QMainWindow):
         delay_layout.addStretch()
         settings_layout.addLayout(delay_layout)
         
+        self.adaptive_pacing_check = QCheckBox("Adaptive pacing (delay is a maximum, skipped for non-UI actions)")
+        self.adaptive_pacing_check.setToolTip(
+            "Continue as soon as the screen or page has settled instead of always waiting the full delay"
+        )
+        self.adaptive_pacing_check.setChecked(True)
+        settings_layout.addWidget(self.adaptive_pacing_check)
+        
+        replay_layout = QHBoxLayout()
+        self.replay_check = QCheckBox("Replay recorded timing at")
+        self.replay_check.setToolTip(
+            "Wait between recorded steps as long as you did while recording, divided by the speed. "
+            "Steps added by hand use the delay above."
+        )
+        replay_layout.addWidget(self.replay_check)
+        self.replay_speed_combo = QComboBox()
+        for label, speed in REPLAY_SPEEDS.items():
+            self.replay_speed_combo.addItem(label, speed)
+        replay_layout.addWidget(self.replay_speed_combo)
+        replay_layout.addStretch()
+        settings_layout.addLayout(replay_layout)
+        
+        self.profile_check = QCheckBox("Profile steps (show the slowest steps after the run)")
+        self.profile_check.setToolTip(
+            "Record wall time, wait time and element lookup retries for every step, including nested ones"
+        )
+        settings_layout.addWidget(self.profile_check)
+        
+        parallel_layout = QHBoxLayout()
+        parallel_layout.addWidget(QLabel("Parallel headless browsers:"))
+        self.parallel_spinbox = QSpinBox()
+        self.parallel_spinbox.setMinimum(1)
+        self.parallel_spinbox.setMaximum(16)
+        self.parallel_spinbox.setValue(1)
+        self.parallel_spinbox.setToolTip(
+            "Split the rows of the workflow's first CSV/Excel read across several browsers "
+            "(web and data workflows only)"
+        )
+        parallel_layout.addWidget(self.parallel_spinbox)
+        parallel_layout.addStretch()
+        settings_layout.addLayout(parallel_layout)
+        
         # Loop execution
         loop_layout = QHBoxLayout()
         self.loop_check = QCheckBox("Repeat workflow")
@@ -920,21 +1396,51 @@ class RPAMainWindow(QMainWindow):
         self.stop_execute_btn = QPushButton("⏹️ Stop Execution")
         self.stop_execute_btn.setStyleSheet("background-color: #f44336; color: white; font-size: 14px; padding: 12px;")
         self.stop_execute_btn.setEnabled(False)
+        self.stop_execute_btn.clicked.connect(self.stop_execution)
         execute_layout.addWidget(self.stop_execute_btn)
         
+        self.pause_execute_btn = QPushButton("⏸️ Pause")
+        self.pause_execute_btn.setStyleSheet("background-color: #FF9800; color: white; font-size: 14px; padding: 12px;")
+        self.pause_execute_btn.setCheckable(True)
+        self.pause_execute_btn.setEnabled(False)
+        self.pause_execute_btn.toggled.connect(self.toggle_pause_execution)
+        execute_layout.addWidget(self.pause_execute_btn)
+        
         layout.addLayout(execute_layout)
         
         # Execution log
         log_group = QGroupBox("Execution Log")
         log_layout = QVBoxLayout()
         
-        self.execution_log = QTextEdit()
+        self.execution_log = QPlainTextEdit()
         self.execution_log.setReadOnly(True)
+        self.execution_log.setMaximumBlockCount(EXECUTION_LOG_LINES)
         log_layout.addWidget(self.execution_log)
         
         log_group.setLayout(log_layout)
         layout.addWidget(log_group)
         
+        # Profile of the last run, when profiling was on
+        self.profile_group = QGroupBox("Step Profile (slowest steps)")
+        profile_layout = QVBoxLayout()
+        
+        self.hotspot_table = QTableWidget(0, 8)
+        self.hotspot_table.setHorizontalHeaderLabels(
+            ["Step", "Action", "Runs", "Total (s)", "Waiting (s)", "Busy (s)", "Retries", "Slowest (s)"]
+        )
+        self.hotspot_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.hotspot_table.verticalHeader().setVisible(False)
+        self.hotspot_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        profile_layout.addWidget(self.hotspot_table)
+        
+        export_profile_btn = QPushButton("💾 Export Profile...")
+        export_profile_btn.clicked.connect(self.export_profile)
+        profile_layout.addWidget(export_profile_btn)
+        
+        self.profile_group.setLayout(profile_layout)
+        self.profile_group.setVisible(False)
+        layout.addWidget(self.profile_group)
+        
         return widget
         
     def create_manage_tab(self):
@@ -978,8 +1484,7 @@ class RPAMainWindow(QMainWindow):
         info_group = QGroupBox("Workflow Information")
         info_layout = QVBoxLayout()
         
-        self.workflow_info = QTextEdit()
-        self.workflow_info.setReadOnly(True)
+        self.workflow_info = WorkflowPreview(self.format_action_text)
         info_layout.addWidget(self.workflow_info)
         
         info_group.setLayout(info_layout)
@@ -1031,6 +1536,22 @@ class RPAMainWindow(QMainWindow):
         wait_group.setLayout(wait_layout)
         layout.addWidget(wait_group)
         
+        # Image recognition
+        image_group = QGroupBox("Image Recognition")
+        image_layout = QVBoxLayout()
+        image_layout.addWidget(QLabel("Find things on screen by how they look, not where they were:"))
+        image_layout.addWidget(QLabel("• Click a button wherever its window is"))
+        image_layout.addWidget(QLabel("• Wait until something appears"))
+        image_buttons = QHBoxLayout()
+        for label, action_type in (("Find Image", "find_image"), ("Click Image", "click_image"),
+                                   ("Wait for Image", "wait_for_image")):
+            image_btn = QPushButton(label)
+            image_btn.clicked.connect(partial(self.add_manual_action, action_type))
+            image_buttons.addWidget(image_btn)
+        image_layout.addLayout(image_buttons)
+        image_group.setLayout(image_layout)
+        layout.addWidget(image_group)
+        
         # Screenshots
         screenshot_group = QGroupBox("Screenshots")
         screenshot_layout = QVBoxLayout()
@@ -1057,6 +1578,7 @@ class RPAMainWindow(QMainWindow):
             <li><b>Screenshots:</b> Helpful for debugging and verification</li>
             <li><b>Loops:</b> Great for repetitive tasks like data entry</li>
             <li><b>Conditions:</b> Make workflows adaptive to different scenarios</li>
+            <li><b>Images:</b> Record with screenshots on, then turn clicks into image clicks in the Record tab</li>
             <li><b>Manual Actions:</b> Add precise actions that are hard to record</li>
         </ul>
         """)
@@ -1069,7 +1591,11 @@ class RPAMainWindow(QMainWindow):
     def start_recording(self):
         """Start recording with options"""
         self.current_actions = []
-        self.actions_list.clear()
+        if self.counter_only_check.isChecked():
+            # Nothing is listed until the recording is done
+            self.action_model.set_actions([])
+        else:
+            self.action_model.set_actions(self.current_actions)
         
         capture_movement = self.capture_movement_check.isChecked()
         capture_screenshots = self.capture_screenshots_check.isChecked()
@@ -1083,45 +1609,67 @@ class RPAMainWindow(QMainWindow):
         self.statusBar().showMessage("Recording in progress...")
         
     def stop_recording(self):
-        """Stop recording"""
+        """Stop recording; the recorder finishes the queued events first"""
+        self.stop_record_btn.setEnabled(False)
+        self.record_status_label.setText("Status: Stopping...")
         self.recorder_thread.stop_recording()
         
+    def on_recording_finished(self):
+        """Recorder thread is done and every recorded action has arrived"""
         self.start_record_btn.setEnabled(True)
-        self.stop_record_btn.setEnabled(False)
-        self.record_status_label.setText(f"Status: ✓ Recording stopped ({len(self.current_actions)} actions captured)")
+        self.show_current_actions()
+        captured = f"{len(self.current_actions)} actions captured"
+        if self.optimize_recording_check.isChecked() and self.current_actions:
+            captured += ", " + self.optimize_actions()
+        self.record_status_label.setText(f"Status: ✓ Recording stopped ({captured})")
         self.record_status_label.setStyleSheet("font-size: 13px; padding: 5px; color: green;")
-        self.statusBar().showMessage(f"Recording stopped. {len(self.current_actions)} actions captured")
-        
-    def on_action_recorded(self, action):
-        """Handle recorded action"""
-        self.current_actions.append(action)
-        
-        if action["type"] == "click":
-            text = f"[{len(self.current_actions)}] Click at ({action['x']}, {action['y']}) - {action['button']}"
-        elif action["type"] == "mouse_move":
-            text = f"[{len(self.current_actions)}] Move to ({action['x']}, {action['y']})"
+        self.statusBar().showMessage(f"Recording stopped. {captured}")
+        
+    def optimize_actions(self):
+        """Rewrite the recorded actions into fewer steps; returns a summary"""
+        actions, stats = optimize_recording(self.current_actions, self.delay_spinbox.value())
+        self.current_actions = actions
+        self.action_model.set_actions(actions)
+        summary = (
+            f"optimized from {stats['steps_before']} to {stats['steps_after']} steps, "
+            f"about {stats['time_saved']:.1f}s faster to replay"
+        )
+        self.statusBar().showMessage(f"Recording {summary}")
+        return summary
+        
+    def on_actions_recorded(self, actions):
+        """Handle a batch of recorded actions"""
+        if self.action_model.actions is self.current_actions:
+            self.action_model.append_actions(actions)
+            self.actions_list.scrollToBottom()
         else:
-            text = f"[{len(self.current_actions)}] Key press: {action['key']}"
-            
-        self.actions_list.addItem(text)
+            self.current_actions.extend(actions)
+        self.record_status_label.setText(f"Status: 🔴 Recording... ({len(self.current_actions):,} actions)")
         
+    def show_current_actions(self):
+        """List current_actions again if only counting during a recording.
+
+        The action list edits whatever list it shows, so this goes first
+        wherever actions are added, changed or removed by hand.
+        """
+        if self.action_model.actions is not self.current_actions:
+            self.action_model.set_actions(self.current_actions)
+
     def add_manual_action(self, action_type="click"):
         """Open dialog to add manual action"""
         dialog = ActionDialog(self, action_type)
         if dialog.exec() == QDialog.Accepted:
             action = dialog.get_action()
-            self.current_actions.append(action)
-            
-            # Add to list
-            action_text = self.format_action_text(len(self.current_actions), action)
-            self.actions_list.addItem(action_text)
+            self.show_current_actions()
+            self.action_model.append_actions([action])
             
     def format_action_text(self, index, action):
         """Format action for display"""
         action_type = action["type"]
         
         if action_type == "click":
-            return f"[{index}] Click at ({action['x']}, {action['y']}) - {action.get('button', 'left')}"
+            screenshot = " 📷" if action.get("screenshot_blob") else ""
+            return f"[{index}] Click at ({action['x']}, {action['y']}) - {action.get('button', 'left')}{screenshot}"
         elif action_type == "mouse_move":
             return f"[{index}] Move to ({action['x']}, {action['y']})"
         elif action_type == "key":
@@ -1136,6 +1684,9 @@ class RPAMainWindow(QMainWindow):
             return f"[{index}] IF: {action.get('condition', 'N/A')}"
         elif action_type == "loop":
             return f"[{index}] LOOP: {action.get('iterations', 1)} times"
+        elif action_type == "for_each_row":
+            source = action.get('file_path') or action.get('data_variable') or 'N/A'
+            return f"[{index}] FOR EACH ROW in: {source} as {action.get('row_variable', 'row')}"
         elif action_type == "web_navigate":
             return f"[{index}] Navigate to: {action.get('url', 'N/A')}"
         elif action_type == "web_click":
@@ -1152,12 +1703,32 @@ class RPAMainWindow(QMainWindow):
             return f"[{index}] Read CSV: {action.get('file_path', 'N/A')}"
         elif action_type == "csv_write":
             return f"[{index}] Write CSV: {action.get('file_path', 'N/A')}"
+        elif action_type in ("find_image", "click_image", "wait_for_image"):
+            template = action.get('template', 'N/A')
+            if action.get("screenshot_blob") == template:
+                template = "recorded screenshot 📷"
+            verb = {"find_image": "Find Image", "click_image": "Click Image", "wait_for_image": "Wait for Image"}
+            return f"[{index}] {verb[action_type]}: {template}"
         else:
             return f"[{index}] {action_type}"
             
+    def show_action_screenshot(self, index):
+        """Show the screenshot recorded with an action, loading it on demand"""
+        row = index.row()
+        if row < 0 or row >= len(self.current_actions):
+            return
+        ref = self.current_actions[row].get("screenshot_blob")
+        if not ref:
+            return
+        if not BLOB_STORE.exists(ref):
+            QMessageBox.warning(self, "Warning", "The screenshot for this action is missing!")
+            return
+        self.on_screenshot_captured(QPixmap(str(BLOB_STORE.path(ref))))
+            
     def edit_action(self):
         """Edit selected action"""
-        current_row = self.actions_list.currentRow()
+        self.show_current_actions()
+        current_row = self.actions_list.currentIndex().row()
         if current_row < 0 or current_row >= len(self.current_actions):
             QMessageBox.warning(self, "Warning", "Please select an action to edit!")
             return
@@ -1174,30 +1745,44 @@ class RPAMainWindow(QMainWindow):
             dialog.wait_spin.setValue(action.get("duration", 2))
             
         if dialog.exec() == QDialog.Accepted:
-            self.current_actions[current_row] = dialog.get_action()
-            action_text = self.format_action_text(current_row + 1, self.current_actions[current_row])
-            self.actions_list.item(current_row).setText(action_text)
+            self.action_model.replace_action(current_row, dialog.get_action())
             
+    def convert_to_image_click(self):
+        """Replace the selected click with a click_image on its recorded screenshot"""
+        self.show_current_actions()
+        current_row = self.actions_list.currentIndex().row()
+        if current_row < 0 or current_row >= len(self.current_actions):
+            QMessageBox.warning(self, "Warning", "Please select a click action!")
+            return
+        action = self.current_actions[current_row]
+        if action["type"] != "click" or not action.get("screenshot_blob"):
+            QMessageBox.warning(
+                self, "Warning", "Only clicks recorded with 'Capture screenshots on click' can be found by image!"
+            )
+            return
+        self.action_model.replace_action(current_row, {
+            "type": "click_image",
+            "template": action["screenshot_blob"],
+            "button": action.get("button", "left"),
+            "timestamp": action.get("timestamp"),
+            # Keeps the blob referenced, and viewable by double-clicking
+            "screenshot_blob": action["screenshot_blob"]
+        })
+        
     def delete_action(self):
         """Delete selected action"""
-        current_row = self.actions_list.currentRow()
-        if current_row < 0:
+        self.show_current_actions()
+        current_row = self.actions_list.currentIndex().row()
+        if current_row < 0 or current_row >= len(self.current_actions):
             QMessageBox.warning(self, "Warning", "Please select an action to delete!")
             return
             
-        del self.current_actions[current_row]
-        self.actions_list.takeItem(current_row)
-        
-        # Re-number remaining actions
-        for i in range(current_row, self.actions_list.count()):
-            action = self.current_actions[i]
-            action_text = self.format_action_text(i + 1, action)
-            self.actions_list.item(i).setText(action_text)
+        self.action_model.remove_action(current_row)
             
     def clear_actions(self):
         """Clear all actions"""
         self.current_actions = []
-        self.actions_list.clear()
+        self.action_model.set_actions(self.current_actions)
         self.record_status_label.setText("Status: Actions cleared")
         
     def save_workflow(self):
@@ -1219,8 +1804,8 @@ class RPAMainWindow(QMainWindow):
             "action_count": len(self.current_actions)
         }
         
-        self.workflows.append(workflow)
-        self.save_workflows_to_file()
+        if not self.store_workflow(workflow):
+            return
         
         self.workflow_name_input.clear()
         QMessageBox.information(self, "Success", f"Workflow '{name}' saved successfully!")
@@ -1229,23 +1814,39 @@ class RPAMainWindow(QMainWindow):
         self.update_workflow_combo()
         
     def load_workflows(self):
-        """Load workflows from file"""
-        if self.workflows_file.exists():
-            try:
-                with open(self.workflows_file, 'r') as f:
-                    self.workflows = json.load(f)
-                self.update_workflow_combo()
-                self.refresh_workflow_list()
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Could not load workflows: {str(e)}")
-                
-    def save_workflows_to_file(self):
-        """Save workflows to file"""
+        """Load the workflow index"""
+        try:
+            if not self.workflow_store.exists() and self.workflows_file.exists():
+                self.migrate_legacy_workflows()
+            self.workflows = self.workflow_store.list()
+            self.update_workflow_combo()
+            self.refresh_workflow_list()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Could not load workflows: {str(e)}")
+            
+    def migrate_legacy_workflows(self):
+        """Move the single workflows.json of older versions into the workflow store"""
+        with open(self.workflows_file, 'r') as f:
+            legacy = json.load(f)
+        for workflow in legacy:
+            # Screenshots used to be stored inline as base64
+            externalize_screenshots(workflow["actions"], BLOB_STORE)
+        self.workflow_store.add_many(legacy)
+        self.workflows_file.rename(self.workflows_file.with_name(self.workflows_file.name + ".bak"))
+        
+    def store_workflow(self, workflow):
+        """Add a workflow to the store; returns False if it couldn't be saved"""
         try:
-            with open(self.workflows_file, 'w') as f:
-                json.dump(self.workflows, f, indent=2)
+            self.workflow_store.add(workflow)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Could not save workflows: {str(e)}")
+            return False
+        self.workflows = self.workflow_store.list()
+        return True
+        
+    def get_workflow(self, index):
+        """Full workflow for a row of the workflow lists"""
+        return self.workflow_store.get(self.workflows[index]["id"])
             
     def update_workflow_combo(self):
         """Update workflow combo box"""
@@ -1263,40 +1864,23 @@ class RPAMainWindow(QMainWindow):
     def on_workflow_selected(self, index):
         """Handle workflow selection in execute tab"""
         if index < 0 or index >= len(self.workflows):
+            self.workflow_details.clear()
             return
             
-        workflow = self.workflows[index]
-        
-        details = f"Name: {workflow['name']}\n"
-        details += f"Created: {workflow['created']}\n"
-        details += f"Actions: {workflow['action_count']}\n\n"
-        details += "Action List:\n"
-        
-        for i, action in enumerate(workflow['actions'], 1):
-            details += f"  {self.format_action_text(i, action)}\n"
-                
-        self.workflow_details.setText(details)
+        self.workflow_details.show_workflow(self.workflows[index], self.get_workflow(index))
         
     def on_manage_workflow_selected(self, current, previous):
         """Handle workflow selection in manage tab"""
         if not current:
+            self.workflow_info.clear()
             return
             
         index = self.manage_workflow_list.row(current)
         if index < 0 or index >= len(self.workflows):
+            self.workflow_info.clear()
             return
             
-        workflow = self.workflows[index]
-        
-        info = f"Name: {workflow['name']}\n"
-        info += f"Created: {workflow['created']}\n"
-        info += f"Total Actions: {workflow['action_count']}\n\n"
-        info += "Actions:\n"
-        
-        for i, action in enumerate(workflow['actions'], 1):
-            info += f"  {self.format_action_text(i, action)}\n"
-                
-        self.workflow_info.setText(info)
+        self.workflow_info.show_workflow(self.workflows[index], self.get_workflow(index))
         
     def delete_workflow(self):
         """Delete selected workflow"""
@@ -1316,12 +1900,23 @@ class RPAMainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            del self.workflows[index]
-            self.save_workflows_to_file()
+            try:
+                self.workflow_store.delete(self.workflows[index]["id"])
+            except Exception as e:
+                QMessageBox.warning(self, "Error", f"Could not save workflows: {str(e)}")
+                return
+            self.workflows = self.workflow_store.list()
+            self.collect_screenshot_garbage()
             self.refresh_workflow_list()
             self.update_workflow_combo()
             QMessageBox.information(self, "Success", "Workflow deleted successfully!")
             
+    def collect_screenshot_garbage(self):
+        """Delete screenshot blobs no saved or unsaved workflow refers to"""
+        referenced = screenshot_refs(self.current_actions)
+        referenced |= self.workflow_store.referenced_blobs()
+        BLOB_STORE.collect_garbage(referenced)
+            
     def duplicate_workflow(self):
         """Duplicate selected workflow"""
         current_item = self.manage_workflow_list.currentItem()
@@ -1330,14 +1925,14 @@ class RPAMainWindow(QMainWindow):
             return
             
         index = self.manage_workflow_list.row(current_item)
-        workflow = self.workflows[index].copy()
+        workflow = self.get_workflow(index).copy()
         
         workflow["name"] = workflow["name"] + " (Copy)"
         workflow["created"] = datetime.now().isoformat()
         workflow["actions"] = workflow["actions"].copy()
         
-        self.workflows.append(workflow)
-        self.save_workflows_to_file()
+        if not self.store_workflow(workflow):
+            return
         self.refresh_workflow_list()
         self.update_workflow_combo()
         QMessageBox.information(self, "Success", "Workflow duplicated successfully!")
@@ -1350,7 +1945,7 @@ class RPAMainWindow(QMainWindow):
             return
             
         index = self.manage_workflow_list.row(current_item)
-        workflow = self.workflows[index]
+        workflow = self.get_workflow(index)
         
         from PySide6.QtWidgets import QFileDialog
         filename, _ = QFileDialog.getSaveFileName(
@@ -1362,8 +1957,13 @@ class RPAMainWindow(QMainWindow):
         
         if filename:
             try:
+                # Embed screenshots so the exported file is self-contained
+                exported = dict(workflow, actions=inline_screenshots(workflow["actions"], BLOB_STORE))
+                exported.pop("id", None)
+                # Screenshots are embedded now, not blob references
+                exported.pop("screenshot_refs", None)
                 with open(filename, 'w') as f:
-                    json.dump(workflow, f, indent=2)
+                    json.dump(exported, f, indent=2)
                 QMessageBox.information(self, "Success", f"Workflow exported to {filename}")
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Could not export workflow: {str(e)}")
@@ -1390,9 +1990,10 @@ class RPAMainWindow(QMainWindow):
                 # Update metadata
                 workflow["created"] = datetime.now().isoformat()
                 workflow["action_count"] = len(workflow["actions"])
+                externalize_screenshots(workflow["actions"], BLOB_STORE)
                 
-                self.workflows.append(workflow)
-                self.save_workflows_to_file()
+                if not self.store_workflow(workflow):
+                    return
                 self.refresh_workflow_list()
                 self.update_workflow_combo()
                 QMessageBox.information(self, "Success", f"Workflow '{workflow['name']}' imported successfully!")
@@ -1406,44 +2007,112 @@ class RPAMainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please select a workflow to execute!")
             return
             
-        workflow = self.workflows[index]
+        workflow = self.get_workflow(index)
         delay = self.delay_spinbox.value()
-        
-        # Handle loop execution
-        if self.loop_check.isChecked():
-            loop_count = self.loop_count.value()
-            # Wrap workflow in a loop
-            workflow = {
-                "name": workflow["name"],
-                "actions": [{
-                    "type": "loop",
-                    "iterations": loop_count,
-                    "actions": workflow["actions"]
-                }]
-            }
+        adaptive_pacing = self.adaptive_pacing_check.isChecked()
+        loop_count = self.loop_count.value() if self.loop_check.isChecked() else 1
+        workers = self.parallel_spinbox.value()
+        profile = self.profile_check.isChecked()
+        replay_speed = self.replay_speed_combo.currentData() if self.replay_check.isChecked() else None
         
         self.execution_log.clear()
-        self.execution_log.append(f"Starting execution of '{self.workflows[index]['name']}'...\n")
+        self.execution_log.appendPlainText(f"Starting execution of '{workflow['name']}'...\n")
+        
+        parallel = False
+        if workers > 1:
+            if replay_speed is not None:
+                # Workers split the rows and run headless; there is no single
+                # recorded timeline to follow
+                self.execution_log.appendPlainText(
+                    "Replaying recorded timing can't be combined with parallel execution; "
+                    "running in a single browser.\n"
+                )
+            elif is_web_only(workflow["actions"]) and find_data_source(workflow["actions"])[1] is not None:
+                parallel = True
+            else:
+                self.execution_log.appendPlainText(
+                    "Parallel execution needs a web/data-only workflow with one CSV or Excel source to split "
+                    "(a csv_read/excel_read, or a for_each_row over a file); running in a single browser.\n"
+                )
+        
+        if parallel:
+            self.executor_thread = ParallelExecutorThread(
+                workflow, delay, adaptive_pacing, workers, loop_count, profile=profile
+            )
+        else:
+            # Handle loop execution
+            if loop_count > 1:
+                # Wrap workflow in a loop
+                workflow = {
+                    "name": workflow["name"],
+                    "actions": [{
+                        "type": "loop",
+                        "iterations": loop_count,
+                        "actions": workflow["actions"]
+                    }]
+                }
+            self.executor_thread = ExecutorThread(
+                workflow, delay, adaptive_pacing, profile=profile, replay_speed=replay_speed
+            )
+            self.executor_thread.screenshot_captured.connect(self.on_screenshot_captured)
+        
         self.execute_btn.setEnabled(False)
         self.stop_execute_btn.setEnabled(True)
+        self.pause_execute_btn.setEnabled(True)
         
         # Start executor thread
-        self.executor_thread = ExecutorThread(workflow, delay)
-        self.executor_thread.progress_update.connect(self.on_execution_progress)
         self.executor_thread.execution_complete.connect(self.on_execution_complete)
-        self.executor_thread.screenshot_captured.connect(self.on_screenshot_captured)
+        self.execution_started = time.monotonic()
+        self.progress_timer.start()
         self.executor_thread.start()
         
-    def on_execution_progress(self, message):
-        """Handle execution progress update"""
-        self.execution_log.append(message)
-        self.statusBar().showMessage(message)
+    def stop_execution(self):
+        """Cancel the running workflow; it stops at its next step or wait"""
+        if self.executor_thread is None or not self.executor_thread.isRunning():
+            return
+        self.executor_thread.cancel()
+        self.stop_execute_btn.setEnabled(False)
+        self.pause_execute_btn.setEnabled(False)
+        self.execution_log.appendPlainText("Stopping...")
+        
+    def toggle_pause_execution(self, paused):
+        """Pause or resume the running workflow"""
+        if self.executor_thread is None or not self.executor_thread.isRunning():
+            return
+        if paused:
+            self.executor_thread.pause()
+            self.pause_execute_btn.setText("▶️ Resume")
+            self.execution_log.appendPlainText("Paused")
+        else:
+            self.executor_thread.resume()
+            self.pause_execute_btn.setText("⏸️ Pause")
+            self.execution_log.appendPlainText("Resumed")
+        
+    def flush_execution_progress(self):
+        """Show progress buffered by the executor since the last flush"""
+        progress = self.executor_thread.progress
+        messages = progress.drain()
+        if messages:
+            self.execution_log.appendPlainText("\n".join(messages))
+        if progress.steps:
+            rate = progress.steps / max(time.monotonic() - self.execution_started, 1e-3)
+            self.statusBar().showMessage(
+                f"Step {progress.steps} ({rate:.0f} steps/s): {progress.current_step}"
+            )
         
     def on_execution_complete(self, success, message):
         """Handle execution completion"""
-        self.execution_log.append(f"\n{message}")
+        self.progress_timer.stop()
+        self.flush_execution_progress()
+        self.execution_log.appendPlainText(f"\n{message}")
         self.execute_btn.setEnabled(True)
         self.stop_execute_btn.setEnabled(False)
+        self.pause_execute_btn.blockSignals(True)
+        self.pause_execute_btn.setChecked(False)
+        self.pause_execute_btn.blockSignals(False)
+        self.pause_execute_btn.setText("⏸️ Pause")
+        self.pause_execute_btn.setEnabled(False)
+        self.show_profile(self.executor_thread.profiler)
         self.statusBar().showMessage(message)
         
         if success:
@@ -1451,6 +2120,41 @@ class RPAMainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "Error", message)
             
+    def show_profile(self, profiler):
+        """Fill the hotspot table from a finished run's profiler, or hide it"""
+        self.last_profile = profiler
+        self.profile_group.setVisible(profiler is not None)
+        if profiler is None:
+            return
+        hotspots = profiler.hotspots(HOTSPOT_ROWS)
+        self.hotspot_table.setRowCount(len(hotspots))
+        for row, stats in enumerate(hotspots):
+            values = [
+                stats.key, stats.action_type, str(stats.calls), f"{stats.wall:.3f}",
+                f"{stats.wait:.3f}", f"{stats.wall - stats.wait:.3f}", str(stats.retries), f"{stats.slowest:.3f}"
+            ]
+            for column, value in enumerate(values):
+                self.hotspot_table.setItem(row, column, QTableWidgetItem(value))
+        
+    def export_profile(self):
+        """Save the last run's profile as JSON or CSV"""
+        if self.last_profile is None:
+            return
+        from PySide6.QtWidgets import QFileDialog
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export Profile",
+            "profile.json",
+            "JSON Files (*.json);;CSV Files (*.csv)"
+        )
+        
+        if filename:
+            try:
+                self.last_profile.export(filename)
+                QMessageBox.information(self, "Success", f"Profile exported to {filename}")
+            except Exception as e:
+                QMessageBox.warning(self, "Error", f"Could not export profile: {str(e)}")
+            
     def on_screenshot_captured(self, pixmap):
         """Handle screenshot capture"""
         # Display screenshot in a new window
@@ -1471,6 +2175,10 @@ class RPAMainWindow(QMainWindow):
 
 
 def main():
+    # --startup-time: print how long startup took, then exit
+    measure_startup = "--startup-time" in sys.argv
+    main_started = time.perf_counter()
+    
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     
@@ -1487,10 +2195,26 @@ def main():
     palette.setColor(QPalette.Highlight, QColor(76, 175, 80))
     palette.setColor(QPalette.HighlightedText, QColor(255, 255, 255))
     app.setPalette(palette)
+    app.aboutToQuit.connect(DRIVER_POOL.shutdown)
+    app_created = time.perf_counter()
     
     window = RPAMainWindow()
+    window_built = time.perf_counter()
     window.show()
     
+    if measure_startup:
+        def report_startup():
+            shown = time.perf_counter()
+            print("Startup time:")
+            print(f"  module imports        {main_started - MODULE_LOAD_STARTED:7.3f} s")
+            print(f"  QApplication          {app_created - main_started:7.3f} s")
+            print(f"  window construction   {window_built - app_created:7.3f} s")
+            print(f"  first event loop pass {shown - window_built:7.3f} s")
+            print(f"  time to first window  {shown - MODULE_LOAD_STARTED:7.3f} s")
+            print(f"  deferred modules loaded: {', '.join(LazyModule.loaded) or 'none'}")
+            app.quit()
+        QTimer.singleShot(0, report_startup)
+    
     sys.exit(app.exec())
 
 
@@ -0,0 +1,110 @@
+"""Micro-benchmark: per-step dispatch cost of the executor.
+
+Compares the old if/elif dispatch on action["type"] against running a
+compiled plan through the handler registry: the plan alone, a first run
+that compiles it, and later runs of a saved workflow whose plan is
+cached. pyautogui is replaced with a no-op fake so only the dispatch
+overhead is measured.
+
+Usage:
+    python benchmarks/bench_dispatch.py [steps] [repeats]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import rpa_engine
+from rpa_engine import ExecutionEngine, EventSink, PlanCache, compile_plan
+from fakes import FakePyAutoGUI
+
+
+def make_workflow(steps):
+    """Synthetic workflow mixing the desktop action types"""
+    pattern = [
+        {"type": "click", "x": 10, "y": 20, "button": "left"},
+        {"type": "mouse_move", "x": 30, "y": 40, "duration": 0},
+        {"type": "key", "key": "enter"},
+        {"type": "type_text", "text": "hello", "interval": 0},
+        {"type": "if_condition", "condition": "x"},
+    ]
+    return [dict(pattern[i % len(pattern)]) for i in range(steps)]
+
+
+def legacy_execute(executor, actions):
+    """The pre-plan dispatch loop, kept here as the baseline"""
+    pyautogui = rpa_engine.pyautogui
+    for i, action in enumerate(actions):
+        action_type = action["type"]
+        executor.report(f"Executing step {i+1}/{len(actions)}: {action_type}")
+        if action_type == "click":
+            pyautogui.click(action["x"], action["y"], button=action.get("button", "left"))
+        elif action_type == "mouse_move":
+            duration = action.get("duration", 0.5)
+            pyautogui.moveTo(action["x"], action["y"], duration=duration)
+        elif action_type == "key":
+            try:
+                pyautogui.press(action["key"])
+            except:
+                pyautogui.write(action["key"])
+        elif action_type == "type_text":
+            interval = action.get("interval", 0.01)
+            pyautogui.write(action["text"], interval=interval)
+        elif action_type == "wait":
+            pass
+        elif action_type == "screenshot":
+            pass
+        elif action_type == "if_condition":
+            condition = action.get("condition", "")
+            executor.report(f"Condition check: {condition}")
+        elif action_type == "loop":
+            pass
+        time.sleep(executor.delay)
+
+
+def best_of(repeats, func):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    rpa_engine.pyautogui = FakePyAutoGUI()
+    actions = make_workflow(steps)
+    # A plain EventSink still receives per-step messages, like the legacy loop
+    executor = ExecutionEngine({"actions": actions}, delay=0, sink=EventSink())
+    # time.sleep(0) still costs a syscall; leave it out of both loops
+    time_sleep = time.sleep
+    time.sleep = lambda s: None
+    try:
+        legacy = best_of(repeats, lambda: legacy_execute(executor, actions))
+        compile_time = best_of(repeats, lambda: compile_plan(actions, executor.handlers))
+        plan = compile_plan(actions, executor.handlers)
+        planned = best_of(repeats, lambda: executor.run_plan(plan))
+        first_run = best_of(repeats, lambda: executor.run_plan(compile_plan(actions, executor.handlers)))
+        cache = PlanCache()
+        saved = {"id": "bench", "actions": actions}
+        cached_run = best_of(repeats, lambda: executor.run_plan(cache.get(saved, executor.handlers)))
+    finally:
+        time.sleep = time_sleep
+
+    print(f"steps: {steps}")
+    print(f"if/elif dispatch:   {legacy / steps * 1e9:8.1f} ns/step")
+    print(f"compiled plan:      {planned / steps * 1e9:8.1f} ns/step")
+    print(f"compile (one-off):  {compile_time / steps * 1e9:8.1f} ns/step")
+    print(f"compile + run:      {first_run / steps * 1e9:8.1f} ns/step  (first run)")
+    print(f"cached plan + run:  {cached_run / steps * 1e9:8.1f} ns/step  (later runs of a saved workflow)")
+    saving = legacy - cached_run
+    if saving > 0:
+        print(f"compiling pays off after {compile_time / saving:.1f} runs of the plan")
+
+
+if __name__ == "__main__":
+    main()
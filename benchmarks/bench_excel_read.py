@@ -0,0 +1,62 @@
+"""Benchmark: excel_read on a generated large workbook.
+
+Compares pandas.read_excel (the old excel_read), openpyxl read-only
+streaming, a column-projected read and a cached repeat read.
+
+Usage:
+    python benchmarks/bench_excel_read.py [rows]
+"""
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import openpyxl
+import pandas as pd
+
+import rpa_engine
+from rpa_engine import read_excel_sheet, cached_excel_read
+
+
+def make_workbook(path, rows):
+    """Write a workbook with a header and rows of mixed column types"""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(["id", "name", "email", "amount", "city", "notes"])
+    for i in range(rows):
+        sheet.append([i, f"Customer {i}", f"user{i}@example.com", i * 1.5, f"City {i % 100}", "x" * 20])
+    workbook.save(path)
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.2f} s")
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workdir = Path(tempfile.mkdtemp(prefix="rpa_bench_"))
+    rpa_engine.EXCEL_CACHE_DIR = workdir / "cache"
+    try:
+        path = workdir / "large.xlsx"
+        timed(f"generate {rows} rows", lambda: make_workbook(path, rows))
+
+        timed("pandas.read_excel (old)", lambda: pd.read_excel(path, sheet_name="Sheet1"))
+        timed("openpyxl read-only", lambda: read_excel_sheet(path, "Sheet1"))
+        timed("read-only, 2 columns", lambda: read_excel_sheet(path, "Sheet1", usecols=["id", "email"]))
+        timed("read-only, first 1000 rows", lambda: read_excel_sheet(path, "Sheet1", max_rows=1000))
+        timed("cached read (cold)", lambda: cached_excel_read(path, sheet_name="Sheet1"))
+        df, cached = timed("cached read (warm)", lambda: cached_excel_read(path, sheet_name="Sheet1"))
+        assert cached and len(df) == rows
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+"""Benchmark suite for the executor, storage and recorder hot paths.
+
+Runs headless: pyautogui and Selenium are replaced by the in-process
+fakes from fakes.py, so only the tool's own overhead is measured.
+Results are saved to benchmarks/results/<time>-<commit>.json and
+compared with the latest earlier result of the same size, so a change
+can be checked for regressions before it is committed.
+
+Benchmarks:
+    dispatch  executor throughput on flat desktop and web workflows, 10k-1M steps,
+              with and without compiling the plan first
+              (the 1M-step workflows need about 1 GB of memory; --quick stops at 100k)
+    nested    per-step cost of nested loops against a flat workflow
+    store     workflows.json load/save with and without embedded screenshots,
+              and the per-workflow store
+    data      csv/excel read and write on generated files (needs pandas, openpyxl)
+    recorder  recorder input hook cost, sustained event rate and lost events (needs PySide6)
+    preview   time to show a large saved workflow in the preview (needs PySide6)
+    vision    image template matching on a synthetic 1080p screen (needs NumPy, Pillow)
+
+Usage:
+    python benchmarks/bench_suite.py [--quick] [--only dispatch,store]
+                                     [--compare RESULT.json] [--no-save]
+"""
+import argparse
+import base64
+import csv
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fakes
+import rpa_engine
+from rpa_engine import ExecutionEngine, compile_plan
+from rpa_storage import BlobStore, WorkflowStore, count_action_types, externalize_screenshots
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# A metric that got worse by more than this fraction is flagged
+REGRESSION_THRESHOLD = 0.10
+
+# Registry of benchmark functions, filled by @benchmark
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register func(quick) as a benchmark; it returns a list of metrics"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def metric(name, value, unit, higher_is_better=True):
+    return {"name": name, "value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def best_of(repeats, func):
+    """Fastest of repeats runs of func, in seconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def desktop_workflow(steps):
+    """Flat workflow cycling through the desktop action types"""
+    pattern = [
+        {"type": "click", "x": 10, "y": 20, "button": "left"},
+        {"type": "mouse_move", "x": 30, "y": 40, "duration": 0},
+        {"type": "key", "key": "enter"},
+        {"type": "type_text", "text": "hello", "interval": 0},
+        {"type": "if_condition", "condition": "x"},
+    ]
+    return [pattern[i % len(pattern)] for i in range(steps)]
+
+
+def web_workflow(steps):
+    """Flat workflow of web actions, after one navigation"""
+    pattern = [
+        {"type": "web_click", "selector_type": "id", "selector": "submit"},
+        {"type": "web_type", "selector_type": "css", "selector": "#email", "text": "${user.email}"},
+        {"type": "web_extract", "selector_type": "xpath", "selector": "//h1", "variable": "title"},
+    ]
+    navigate = {"type": "web_navigate", "url": "https://example.com"}
+    return [navigate] + [pattern[i % len(pattern)] for i in range(steps - 1)]
+
+
+@benchmark("dispatch")
+def bench_dispatch(quick):
+    sizes = [10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]
+    results = []
+    for steps in sizes:
+        repeats = 3 if steps < 1_000_000 else 1
+        for kind, make in (("desktop", desktop_workflow), ("web", web_workflow)):
+            actions = make(steps)
+            engine = ExecutionEngine({"actions": actions}, delay=0, variables={"user": {"email": "a@b.c"}})
+            compile_time = best_of(repeats, lambda: compile_plan(actions, engine.handlers))
+            plan = compile_plan(actions, engine.handlers)
+            run_time = best_of(repeats, lambda: engine.run_plan(plan))
+            # A first run compiles its plan; later runs of a saved workflow reuse it
+            first_run = best_of(repeats, lambda: engine.run_plan(compile_plan(actions, engine.handlers)))
+            results.append(metric(f"dispatch.{kind}.{steps}", steps / run_time, "steps/s"))
+            results.append(metric(f"compile.{kind}.{steps}", steps / compile_time, "steps/s"))
+            results.append(metric(f"first_run.{kind}.{steps}", steps / first_run, "steps/s"))
+    return results
+
+
+@benchmark("nested")
+def bench_nested(quick):
+    steps = 100_000 if quick else 1_000_000
+    step = {"type": "if_condition", "condition": "x"}
+    side = round(steps ** (1 / 3))
+    layouts = {
+        "flat": [step] * steps,
+        "loop": [{"type": "loop", "iterations": steps, "actions": [step]}],
+        "depth3": [{"type": "loop", "iterations": side, "actions": [
+            {"type": "loop", "iterations": side, "actions": [
+                {"type": "loop", "iterations": side, "actions": [step]}
+            ]}
+        ]}]
+    }
+    counts = {"flat": steps, "loop": steps, "depth3": side ** 3}
+    engine = ExecutionEngine({"actions": []}, delay=0)
+    results = []
+    for name, actions in layouts.items():
+        plan = compile_plan(actions, engine.handlers)
+        elapsed = best_of(3, lambda: engine.run_plan(plan))
+        results.append(metric(f"nested.{name}", elapsed / counts[name] * 1e9, "ns/step", False))
+    return results
+
+
+def screenshot_bytes(i, size=4096):
+    """Distinct, incompressible stand-in for a 100x100 PNG crop"""
+    return os.urandom(size - 8) + i.to_bytes(8, "big")
+
+
+def library(workflow_count, action_count, screenshots):
+    """Workflows of recorded clicks and keys; every 10th click has an inline screenshot"""
+    workflows = []
+    for w in range(workflow_count):
+        actions = []
+        for a in range(action_count):
+            if a % 2:
+                actions.append({"type": "key", "key": "a", "timestamp": "2026-01-01T00:00:00"})
+                continue
+            action = {"type": "click", "x": a, "y": w, "button": "left", "timestamp": "2026-01-01T00:00:00"}
+            if screenshots and a % 20 == 0:
+                action["screenshot"] = base64.b64encode(screenshot_bytes(w * action_count + a)).decode()
+            actions.append(action)
+        workflows.append({"name": f"Workflow {w}", "created": "2026-01-01T00:00:00", "actions": actions})
+    return workflows
+
+
+@benchmark("store")
+def bench_store(quick):
+    workflow_count, action_count = (20, 200) if quick else (100, 500)
+    workdir = Path(tempfile.mkdtemp(prefix="rpa_bench_"))
+    results = []
+    try:
+        for screenshots in (False, True):
+            label = "screenshots" if screenshots else "plain"
+            workflows = library(workflow_count, action_count, screenshots)
+
+            legacy = workdir / f"workflows_{label}.json"
+
+            def save_legacy():
+                with open(legacy, 'w') as f:
+                    json.dump(workflows, f, indent=2)
+
+            def load_legacy():
+                with open(legacy, 'r') as f:
+                    json.load(f)
+
+            results.append(metric(f"store.legacy_save.{label}", best_of(3, save_legacy) * 1e3, "ms", False))
+            results.append(metric(f"store.legacy_load.{label}", best_of(3, load_legacy) * 1e3, "ms", False))
+            results.append(metric(f"store.legacy_size.{label}", legacy.stat().st_size / 1e6, "MB", False))
+
+            root = workdir / f"store_{label}"
+            blobs = BlobStore(workdir / f"blobs_{label}")
+            store = WorkflowStore(root)
+            start = time.perf_counter()
+            for workflow in workflows:
+                externalize_screenshots(workflow["actions"], blobs)
+                store.add(workflow)
+            results.append(metric(f"store.add_all.{label}", (time.perf_counter() - start) * 1e3, "ms", False))
+
+            extra = library(1, action_count, False)[0]
+            results.append(metric(f"store.add_one.{label}", best_of(3, lambda: store.add(extra)) * 1e3, "ms", False))
+
+            def open_library():
+                WorkflowStore(root).list()
+
+            def open_workflow():
+                fresh = WorkflowStore(root)
+                fresh.get(fresh.list()[0]["id"])
+
+            results.append(metric(f"store.open_index.{label}", best_of(3, open_library) * 1e3, "ms", False))
+            results.append(metric(f"store.open_workflow.{label}", best_of(3, open_workflow) * 1e3, "ms", False))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+@benchmark("data")
+def bench_data(quick):
+    # Raise ImportError, skipping the benchmark, if either is missing
+    for module in ("pandas", "openpyxl"):
+        importlib.import_module(module)
+
+    rows = 20_000 if quick else 200_000
+    workdir = Path(tempfile.mkdtemp(prefix="rpa_bench_"))
+    rpa_engine.EXCEL_CACHE_DIR = workdir / "cache"
+    results = []
+    try:
+        csv_path = workdir / "input.csv"
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "name", "email", "amount", "city"])
+            for i in range(rows):
+                writer.writerow([i, f"Customer {i}", f"user{i}@example.com", i * 1.5, f"City {i % 100}"])
+
+        engine = ExecutionEngine({"actions": []}, delay=0)
+
+        def run(*actions):
+            return best_of(1, lambda: engine.execute_actions(list(actions)))
+
+        cases = [
+            ("csv_read", [{"type": "csv_read", "file_path": str(csv_path), "variable": "data"}]),
+            ("csv_read_chunked", [{"type": "csv_read", "file_path": str(csv_path), "variable": "chunks",
+                                   "chunk_size": 10_000},
+                                  {"type": "csv_write", "file_path": str(workdir / "chunked.csv"),
+                                   "data_variable": "chunks"}]),
+            ("csv_write", [{"type": "csv_write", "file_path": str(workdir / "output.csv"), "data_variable": "data"}]),
+            ("excel_write", [{"type": "excel_write", "file_path": str(workdir / "output.xlsx"),
+                              "data_variable": "data", "mode": "new_workbook"}]),
+            ("excel_read", [{"type": "excel_read", "file_path": str(workdir / "output.xlsx"), "variable": "sheet"}]),
+            ("excel_read_cached", [{"type": "excel_read", "file_path": str(workdir / "output.xlsx"),
+                                    "variable": "sheet", "cache": True}]),
+        ]
+        for name, actions in cases:
+            elapsed = run(*actions)
+            if name == "excel_write":
+                # The workbook is saved when the run's Excel sessions are flushed
+                elapsed += best_of(1, engine.flush_excel_sessions)
+            results.append(metric(f"data.{name}", rows / elapsed, "rows/s"))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def start_recorder(RPA2, capture_screenshots=False):
+    """Start a RecorderThread on fake listeners; returns (recorder, callbacks, received)"""
+    from PySide6.QtCore import Qt
+
+    recorder = RPA2.RecorderThread()
+    received = []
+    recorder.actions_recorded.connect(received.extend, Qt.DirectConnection)
+    fakes.FakeListener.instances.clear()
+    recorder.start_recording(capture_movement=True, capture_screenshots=capture_screenshots)
+    while len(fakes.FakeListener.instances) < 2:
+        time.sleep(0.001)
+    callbacks = {}
+    for listener in fakes.FakeListener.instances:
+        callbacks.update(listener.callbacks)
+    return recorder, callbacks, received
+
+
+@benchmark("recorder")
+def bench_recorder(quick):
+    import RPA2
+
+    fakes.install()
+    RPA2.mouse = RPA2.keyboard = fakes.FakeInputModule
+    events = 20_000 if quick else 200_000
+    workdir = Path(tempfile.mkdtemp(prefix="rpa_bench_"))
+    RPA2.BLOB_STORE = BlobStore(workdir / "blobs")
+    results = []
+    try:
+        # (name, events, screenshots, send); "callback" is the time spent in the
+        # input hook, the plain name is events/s until the last action arrived
+        cases = [
+            ("click", events, False, lambda callbacks, i: callbacks["on_click"](i, i, "Button.left", True)),
+            ("key", events, False, lambda callbacks, i: callbacks["on_press"](fakes.FakeKey)),
+            ("move", events, False, lambda callbacks, i: callbacks["on_move"](i, i)),
+            ("click_screenshot", events // 10, True,
+             lambda callbacks, i: callbacks["on_click"](i, i, "Button.left", True)),
+        ]
+        for name, count, screenshots, send in cases:
+            recorder, callbacks, received = start_recorder(RPA2, screenshots)
+            start = time.perf_counter()
+            for i in range(count):
+                send(callbacks, i)
+            sent = time.perf_counter()
+            recorder.stop_recording()
+            recorder.wait()
+            done = time.perf_counter()
+            results.append(metric(f"recorder.{name}.callback", count / (sent - start), "events/s"))
+            results.append(metric(f"recorder.{name}", count / (done - start), "events/s"))
+            if name != "move":
+                results.append(metric(f"recorder.{name}.lost", count - len(received), "events",
+                                      higher_is_better=False))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+@benchmark("preview")
+def bench_preview(quick):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    import RPA2
+
+    app = QApplication.instance() or QApplication([])
+    preview = RPA2.WorkflowPreview(partial(RPA2.RPAMainWindow.format_action_text, None))
+    preview.resize(600, 400)
+    preview.show()
+    steps = 50_000 if quick else 500_000
+    workflow = {"actions": desktop_workflow(steps)}
+    entry = {"name": "bench", "created": "", "action_count": steps,
+             "action_types": count_action_types(workflow["actions"])}
+
+    def select():
+        preview.show_workflow(entry, workflow)
+        app.processEvents()
+
+    def scroll():
+        for row in range(0, steps, steps // 100):
+            preview.view.scrollTo(preview.model.index(row))
+            app.processEvents()
+
+    results = [
+        metric(f"preview.select.{steps}", best_of(5, select) * 1000, "ms", higher_is_better=False),
+        metric(f"preview.scroll.{steps}", best_of(3, scroll) * 10, "ms/page", higher_is_better=False)
+    ]
+    preview.close()
+    return results
+
+
+def synthetic_screen(width=1920, height=1080, seed=7, widget=None):
+    """Grayscale screen-like image: gradient background, flat boxes, slight noise.
+
+    widget is the (left, top) of a 100 px button-like box with a border
+    and a few strokes, drawn on top of the rest.
+    """
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    screen = np.tile(np.linspace(40, 200, width), (height, 1))
+    for _ in range(400):
+        top, left = rng.integers(0, height - 60), rng.integers(0, width - 160)
+        screen[top:top + rng.integers(12, 60), left:left + rng.integers(30, 160)] = rng.integers(0, 255)
+    if widget is not None:
+        left, top = widget
+        screen[top:top + 100, left:left + 100] = 60
+        screen[top + 3:top + 97, left + 3:left + 97] = 230
+        for i, stroke in enumerate((8, 30, 55, 70)):
+            screen[top + stroke:top + stroke + 4, left + 10 + 5 * i:left + 90 - 7 * i] = 20 + 40 * i
+            screen[top + 10 + 6 * i:top + 85, left + stroke:left + stroke + 3] = 200 - 50 * i
+    screen += rng.normal(0, 3, screen.shape)
+    return Image.fromarray(np.clip(screen, 0, 255).astype(np.uint8))
+
+
+@benchmark("vision")
+def bench_vision(quick):
+    import rpa_vision
+
+    left, top = 1213, 437
+    screen = synthetic_screen(widget=(left, top))
+    workdir = Path(tempfile.mkdtemp(prefix="rpa_bench_"))
+    try:
+        # A recorder-sized template, and a small icon-sized one
+        templates = {}
+        for name, size in (("100px", 100), ("24px", 24)):
+            templates[name] = str(workdir / f"{name}.png")
+            screen.crop((left, top, left + size, top + size)).save(templates[name])
+
+        results = []
+        for name, template in templates.items():
+            def search():
+                return rpa_vision.locate(template, screen)
+
+            def search_cold():
+                rpa_vision.TEMPLATE_CACHE.clear()
+                return rpa_vision.locate(template, screen)
+
+            def search_region():
+                region = screen.crop((left - 150, top - 100, left + 250, top + 200))
+                return rpa_vision.locate(template, region, origin=(left - 150, top - 100))
+
+            def search_scales():
+                return rpa_vision.locate(template, screen, scales=(0.9, 1.0, 1.1))
+
+            for case, func in (("screen", search), ("cold", search_cold), ("region", search_region),
+                               ("scales", search_scales)):
+                match = func()
+                if match is None or (match.left, match.top) != (left, top):
+                    raise RuntimeError(f"vision.{name}.{case}: template not found where it was cut from")
+                results.append(metric(f"vision.{name}.{case}", best_of(3 if quick else 10, func) * 1000, "ms",
+                                      higher_is_better=False))
+
+        absent = synthetic_screen(seed=8)
+        results.append(metric(
+            "vision.100px.miss", best_of(3, lambda: rpa_vision.locate(templates["100px"], absent)) * 1000, "ms",
+            higher_is_better=False
+        ))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def git_commit():
+    """Short hash of HEAD, with "+" if the tree has changes, or "unknown" """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("+" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_result(quick, exclude=None):
+    """Latest saved result of the same size, or None"""
+    for path in sorted(RESULTS_DIR.glob("*.json"), reverse=True):
+        if path == exclude:
+            continue
+        with open(path, 'r') as f:
+            result = json.load(f)
+        if result.get("quick") == quick:
+            return path, result
+    return None
+
+
+def compare(previous, current):
+    """Print each metric against the previous run; returns the number of regressions"""
+    old = {m["name"]: m for m in previous["metrics"]}
+    regressions = 0
+    print(f"\nCompared with {previous['commit']} ({previous['time']}):")
+    for m in current["metrics"]:
+        before = old.get(m["name"])
+        if before is None or not before["value"]:
+            continue
+        change = (m["value"] - before["value"]) / before["value"]
+        worse = -change if m["higher_is_better"] else change
+        flag = "  REGRESSION" if worse > REGRESSION_THRESHOLD else ""
+        regressions += bool(flag)
+        print(f"  {m['name']:<36} {before['value']:>14,.1f} -> {m['value']:>14,.1f} {m['unit']:<9} "
+              f"{change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RPA benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads, for a fast check")
+    parser.add_argument("--only", help=f"comma-separated benchmarks: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--compare", metavar="RESULT", help="result file to compare with (default: latest)")
+    parser.add_argument("--no-save", action="store_true", help="don't store this run's results")
+    args = parser.parse_args()
+
+    fakes.install()
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    result = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "quick": args.quick,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics": [],
+        "skipped": {}
+    }
+    for name in names:
+        print(f"{name}...", flush=True)
+        try:
+            metrics = BENCHMARKS[name](args.quick)
+        except ImportError as e:
+            result["skipped"][name] = str(e)
+            print(f"  skipped: {e}")
+            continue
+        for m in metrics:
+            print(f"  {m['name']:<36} {m['value']:>14,.1f} {m['unit']}")
+        result["metrics"].extend(metrics)
+
+    saved = None
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        saved = RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{result['commit'].rstrip('+')}.json"
+        with open(saved, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved {saved}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)
+    else:
+        found = previous_result(args.quick, exclude=saved)
+        previous = found[1] if found else None
+    if previous:
+        compare(previous, result)
+
+
+if __name__ == "__main__":
+    main()
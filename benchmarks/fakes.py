@@ -0,0 +1,161 @@
+"""In-process stand-ins for pyautogui, pynput and Selenium used by the benchmarks.
+
+install() swaps them into rpa_engine (and rpa_async, if loaded) so
+workflows run without a display, a browser or a WebDriver, and only the
+tool's own overhead is measured. Nothing here is imported by the
+application itself.
+"""
+import sys
+
+import rpa_engine
+
+
+class FakeImage:
+    """What pyautogui.screenshot() returns, minus the pixels"""
+
+    def __init__(self, data=b"\0" * 64):
+        self.data = data
+
+    def tobytes(self):
+        return self.data
+
+    def save(self, fp, format=None):
+        if hasattr(fp, "write"):
+            fp.write(self.data)
+        else:
+            with open(fp, 'wb') as f:
+                f.write(self.data)
+
+
+class FakePyAutoGUI:
+    """Stand-in for pyautogui that does nothing"""
+    def click(self, *args, **kwargs):
+        pass
+
+    def moveTo(self, *args, **kwargs):
+        pass
+
+    def press(self, *args, **kwargs):
+        pass
+
+    def write(self, *args, **kwargs):
+        pass
+
+    def position(self):
+        return 0, 0
+
+    def screenshot(self, *args, **kwargs):
+        return FakeImage()
+
+
+class FakeListener:
+    """pynput Listener that keeps its callbacks instead of hooking input"""
+    instances = []
+
+    def __init__(self, **callbacks):
+        self.callbacks = callbacks
+        FakeListener.instances.append(self)
+
+    def start(self):
+        pass
+
+    def join(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class FakeInputModule:
+    """pynput.mouse / pynput.keyboard"""
+    Listener = FakeListener
+
+
+class FakeKey:
+    """A pynput key that types "a" """
+    char = "a"
+
+
+class FakeBy:
+    """selenium.webdriver.common.by.By"""
+    ID = "id"
+    NAME = "name"
+    XPATH = "xpath"
+    CSS_SELECTOR = "css selector"
+    CLASS_NAME = "class name"
+
+
+class FakeElement:
+    text = "extracted text"
+
+    def click(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def send_keys(self, text):
+        pass
+
+
+class FakeDriver:
+    """WebDriver that finds every element at once and never loads anything"""
+
+    def __init__(self):
+        self.element = FakeElement()
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        return self.element
+
+    def execute_script(self, script, *args):
+        return "complete"
+
+
+class FakeDriverPool:
+    """DRIVER_POOL replacement handing out FakeDrivers"""
+
+    def acquire(self, headless=False):
+        return FakeDriver()
+
+    def release(self, driver, headless=False, origins=()):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class FakeExpectedConditions:
+    """The two expected_conditions the engine uses"""
+
+    @staticmethod
+    def presence_of_element_located(locator):
+        return lambda driver: driver.find_element(*locator)
+
+    element_to_be_clickable = presence_of_element_located
+
+
+class FakeSeleniumExceptions:
+    class NoSuchElementException(Exception):
+        pass
+
+    class TimeoutException(Exception):
+        pass
+
+
+def install():
+    """Replace pyautogui, Selenium and the driver pool in the engine modules and RPA2"""
+    fakes = {
+        "pyautogui": FakePyAutoGUI(),
+        "EC": FakeExpectedConditions,
+        "selenium_exceptions": FakeSeleniumExceptions,
+        "DRIVER_POOL": FakeDriverPool()
+    }
+    for module in (rpa_engine, sys.modules.get("rpa_async"), sys.modules.get("RPA2")):
+        if module is None:
+            continue
+        for name, fake in fakes.items():
+            if hasattr(module, name):
+                setattr(module, name, fake)
@@ -0,0 +1,96 @@
+"""Stress test: sustained recorder event rate without loss.
+
+Drives RecorderThread's listener callbacks from a separate thread, the
+way pynput's hooks do, with a mix of clicks and keypresses at a target
+rate (0 = as fast as possible) for a number of seconds. Reports the rate
+the input hook sustained, how many actions reached the UI side, and the
+latency from event to arrival. Exits with status 1 if any event was
+lost. Needs PySide6; pynput and pyautogui are replaced by the fakes.
+
+Usage:
+    python benchmarks/stress_recorder.py [rate] [seconds] [--screenshots]
+"""
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fakes
+
+
+def fire(callbacks, rate, seconds, sent):
+    """Send clicks and keys at rate events/s for seconds; counts them in sent[0]"""
+    interval = 1 / rate if rate else 0
+    start = time.perf_counter()
+    end = start + seconds
+    i = 0
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        due = start + i * interval
+        if now < due:
+            time.sleep(min(due - now, 0.001))
+            continue
+        if i % 4 == 0:
+            callbacks["on_click"](i % 1920, i % 1080, "Button.left", True)
+        else:
+            callbacks["on_press"](fakes.FakeKey)
+        i += 1
+    sent[0] = i
+
+
+def main():
+    from PySide6.QtCore import Qt
+    import RPA2
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    rate = float(args[0]) if args else 0
+    seconds = float(args[1]) if len(args) > 1 else 5
+    screenshots = "--screenshots" in sys.argv
+
+    fakes.install()
+    RPA2.mouse = RPA2.keyboard = fakes.FakeInputModule
+    recorder = RPA2.RecorderThread()
+    arrivals = []
+    recorder.actions_recorded.connect(lambda batch: arrivals.append((time.time(), batch)), Qt.DirectConnection)
+    fakes.FakeListener.instances.clear()
+    recorder.start_recording(capture_screenshots=screenshots)
+    while len(fakes.FakeListener.instances) < 2:
+        time.sleep(0.001)
+    callbacks = {}
+    for listener in fakes.FakeListener.instances:
+        callbacks.update(listener.callbacks)
+
+    sent = [0]
+    producer = threading.Thread(target=fire, args=(callbacks, rate, seconds, sent))
+    start = time.perf_counter()
+    producer.start()
+    producer.join()
+    recorder.stop_recording()
+    recorder.wait()
+    elapsed = time.perf_counter() - start
+
+    latencies = [
+        arrived - datetime.fromisoformat(action["timestamp"]).timestamp()
+        for arrived, batch in arrivals for action in batch
+    ]
+    received = len(latencies)
+    lost = sent[0] - received
+    print(f"target rate:   {'max' if not rate else f'{rate:,.0f} events/s'}")
+    print(f"sent:          {sent[0]:,} events in {seconds:.1f}s ({sent[0] / seconds:,.0f} events/s)")
+    print(f"received:      {received:,} actions in {len(arrivals):,} batches ({received / elapsed:,.0f} actions/s)")
+    print(f"lost:          {lost:,}")
+    if latencies:
+        latencies.sort()
+        print(f"latency:       median {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    sys.exit(1 if lost else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Asyncio flavour of the workflow execution engine.
+
+AsyncExecutionEngine runs the same compiled plans as ExecutionEngine,
+but waits (wait actions, pacing between steps, polling for web
+elements) are awaited on the event loop instead of blocking a thread.
+Calls that can only block - Selenium, pyautogui, file I/O - run on a
+bounded thread pool shared by all engines. One process can then
+supervise many concurrent web/data workflows:
+
+    results = asyncio.run(run_workflows(workflows, concurrency=100, delay=0))
+
+Desktop actions still work, but concurrent workflows would fight over
+the one mouse and keyboard.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from rpa_engine import (
+    ACTION_HANDLERS, ExecutionEngine, EventSink, Pacer, WorkflowCancelled, EC, ELEMENT_TIMEOUT,
+    ELEMENT_POLL_INTERVAL, IMAGE_POLL_INTERVAL, PLAN_CACHE, compile_plan, pyautogui, selenium_exceptions
+)
+
+# Threads for blocking calls, shared by every AsyncExecutionEngine
+BLOCKING_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="rpa-blocking")
+
+# cancel() and pause() can come from any thread, so awaited sleeps wake
+# up this often to look for them
+CANCEL_POLL_INTERVAL = 0.05
+
+# Registry of coroutine handlers, filled by @async_handler; they replace
+# the blocking handlers for the same action types
+ASYNC_HANDLERS = {}
+
+
+def async_handler(action_type):
+    """Register a coroutine method as the async handler for action_type"""
+    def register(func):
+        ASYNC_HANDLERS[action_type] = func
+        return func
+    return register
+
+
+class LoopSink(EventSink):
+    """Passes events to sink on the event loop's thread.
+
+    Handlers running on the thread pool report through this, so sinks
+    like QueueSink(asyncio.Queue()) only ever see the loop thread.
+    """
+
+    def __init__(self, sink, loop):
+        self.sink = sink
+        self.loop = loop
+        self.quiet = sink.quiet
+
+    def call(self, method, *args):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            method(*args)
+        else:
+            self.loop.call_soon_threadsafe(method, *args)
+
+    def on_start(self, name):
+        self.call(self.sink.on_start, name)
+
+    def on_step(self, label):
+        self.call(self.sink.on_step, label)
+
+    def on_progress(self, message):
+        self.call(self.sink.on_progress, message)
+
+    def on_screenshot(self, path):
+        self.call(self.sink.on_screenshot, path)
+
+    def on_complete(self, success, message):
+        self.call(self.sink.on_complete, success, message)
+
+
+class AsyncPacer(Pacer):
+    """Pacer whose pauses are awaited; screen and page probes run on the pool"""
+
+    async def after_step(self, step):
+        """Pause after a step has run"""
+        if not self.adaptive:
+            await self.executor.sleep(self.delay)
+            return
+        if step.pacing == "none" or self.delay <= 0:
+            self.saved += self.delay
+            return
+        start = time.monotonic()
+        await self.waiters[step.pacing](step, start + self.delay)
+        self.saved += max(0.0, self.delay - (time.monotonic() - start))
+
+    async def wait_screen_stable(self, step, deadline):
+        """Wait until two consecutive grabs of the step's screen region match"""
+        offload = self.executor.offload
+        region = self.screen_region(step)
+        previous = None
+        while time.monotonic() < deadline:
+            try:
+                current = (await offload(partial(pyautogui.screenshot, region=region))).tobytes()
+            except Exception:
+                # Can't observe the screen; fall back to the fixed delay
+                await self.executor.sleep(max(0.0, deadline - time.monotonic()))
+                return
+            if current == previous:
+                return
+            previous = current
+            await self.executor.sleep(min(self.POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+
+    async def wait_dom_ready(self, step, deadline):
+        """Wait until the browser reports the document as loaded"""
+        driver = self.executor.driver
+        if driver is None:
+            return
+        while time.monotonic() < deadline:
+            try:
+                state = await self.executor.offload(driver.execute_script, "return document.readyState")
+            except Exception:
+                return
+            if state == "complete":
+                return
+            await self.executor.sleep(min(self.POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+
+
+class AsyncExecutionEngine(ExecutionEngine):
+    """Executes a workflow as a coroutine; see the module docstring.
+
+    Action types without an @async_handler run their ExecutionEngine
+    handler on pool (BLOCKING_POOL by default), one call at a time per
+    engine, so a workflow's steps still run strictly in order.
+    """
+
+    def __init__(self, workflow, delay=0.5, adaptive_pacing=True, headless=False, variables=None,
+                 sink=None, pool=None):
+        super().__init__(workflow, delay, adaptive_pacing, headless, variables, sink=sink)
+        self.pool = pool or BLOCKING_POOL
+        self.pacer = AsyncPacer(self, delay, adaptive_pacing)
+        self.handlers = ENGINE_HANDLERS
+
+    async def offload(self, func, *args):
+        """Run a blocking call on the pool and await its result"""
+        return await asyncio.get_running_loop().run_in_executor(self.pool, partial(func, *args))
+
+    async def run(self):
+        """Run the workflow; returns (success, message)"""
+        self.sink = LoopSink(self.sink, asyncio.get_running_loop())
+        self.report = self.sink.on_progress
+        self.sink.on_start(self.workflow.get("name", ""))
+        try:
+            plan = PLAN_CACHE.get(self.workflow, self.handlers)
+            await self.run_plan(plan)
+            await self.offload(self.flush_excel_sessions)
+            result = True, "Workflow completed successfully!"
+
+        except WorkflowCancelled:
+            result = False, "Execution stopped by user"
+        except Exception as e:
+            result = False, f"Error: {str(e)}"
+        finally:
+            # Keep whatever was written before a failure
+            await self.offload(self.flush_excel_sessions)
+            await self.offload(self.cleanup_selenium)
+            # Stopped and failed runs were paced too
+            if self.pacer.adaptive:
+                self.report(
+                    f"Adaptive pacing saved {self.pacer.saved:.1f}s versus a fixed {self.delay}s delay"
+                )
+        self.sink.on_complete(*result)
+        return result
+
+    async def check_stop(self):
+        """Raise WorkflowCancelled if cancelled; wait here while paused"""
+        if self.paused or self.cancelled:
+            while self.paused and not self.cancelled:
+                await asyncio.sleep(CANCEL_POLL_INTERVAL)
+            if self.cancelled:
+                raise WorkflowCancelled()
+
+    async def sleep(self, seconds):
+        """asyncio.sleep that is cut short by cancel() and held by pause()"""
+        deadline = time.monotonic() + seconds
+        while True:
+            await self.check_stop()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, CANCEL_POLL_INTERVAL))
+
+    async def execute_actions(self, actions, loop_count=1):
+        """Execute a list of actions"""
+        await self.run_plan(compile_plan(actions, self.handlers), loop_count)
+
+    async def run_plan(self, plan, loop_count=1):
+        """Execute a compiled plan"""
+        emit = None if self.sink.quiet else self.sink.on_step
+        pace = self.pacer.after_step if self.pacer.active else None
+        check_stop = self.check_stop
+        for iteration in range(loop_count):
+            for step in plan:
+                if self.paused or self.cancelled:
+                    await check_stop()
+                if emit:
+                    emit(step.label)
+                if step.templates:
+                    step = self.render_step(step)
+                await step.handler(self, step)
+                if pace:
+                    await pace(step)
+
+    @async_handler("wait")
+    async def do_wait(self, step):
+        wait_time = step.params["duration"]
+        self.report(f"Waiting {wait_time} seconds...")
+        await self.sleep(wait_time)
+
+    @async_handler("loop")
+    async def do_loop(self, step):
+        iterations = step.params["iterations"]
+        self.report(f"Starting loop: {iterations} iterations")
+        await self.run_plan(step.children, iterations)
+
+    @async_handler("for_each_row")
+    async def do_for_each_row(self, step):
+        # Reading rows and writing results/checkpoints is file I/O
+        rows = self.bind_rows(step)
+        try:
+            while await self.offload(next, rows, None) is not None:
+                await self.run_plan(step.children)
+        finally:
+            await self.offload(rows.close)
+
+    async def wait_for_element(self, step, condition):
+        """Poll up to ELEMENT_TIMEOUT seconds for the step's element, or return None"""
+        params = step.params
+        locate = condition((params["by"], params["selector"]))
+        deadline = time.monotonic() + ELEMENT_TIMEOUT
+        while True:
+            try:
+                element = await self.offload(locate, self.driver)
+            except selenium_exceptions.NoSuchElementException:
+                element = None
+            if element:
+                return element
+            if time.monotonic() >= deadline:
+                self.report(f"Element not found: {params['selector']}")
+                return None
+            await self.sleep(ELEMENT_POLL_INTERVAL)
+
+    @async_handler("web_click")
+    async def do_web_click(self, step):
+        if self.driver:
+            element = await self.wait_for_element(step, EC.element_to_be_clickable)
+            if element is not None:
+                await self.offload(element.click)
+                self.report(f"Clicked element: {step.params['selector']}")
+
+    @async_handler("web_type")
+    async def do_web_type(self, step):
+        if self.driver:
+            element = await self.wait_for_element(step, EC.presence_of_element_located)
+            if element is not None:
+                await self.offload(element.clear)
+                await self.offload(element.send_keys, step.params["text"])
+                self.report(f"Typed into element: {step.params['selector']}")
+
+    @async_handler("web_extract")
+    async def do_web_extract(self, step):
+        if self.driver:
+            element = await self.wait_for_element(step, EC.presence_of_element_located)
+            if element is not None:
+                var_name = step.params["variable"]
+                self.variables[var_name] = await self.offload(getattr, element, "text")
+                self.report(f"Extracted data to variable: {var_name}")
+
+    async def wait_for_image(self, step):
+        """Look for the step's template for up to its timeout; returns a Match or None"""
+        deadline = time.monotonic() + step.params["timeout"]
+        while True:
+            match = await self.offload(self.find_on_screen, step)
+            if match is not None or time.monotonic() >= deadline:
+                return match
+            self.retries += 1
+            await self.sleep(IMAGE_POLL_INTERVAL)
+
+    @async_handler("wait_for_image")
+    async def do_wait_for_image(self, step):
+        match = await self.wait_for_image(step)
+        if match is None:
+            raise ValueError(f"Image did not appear within {step.params['timeout']}s: {step.params['template']}")
+        self.variables[step.params["variable"]] = match.to_dict()
+        self.report(f"Image appeared at ({match.x}, {match.y})")
+
+    @async_handler("click_image")
+    async def do_click_image(self, step):
+        match = await self.wait_for_image(step)
+        if match is None:
+            raise ValueError(f"Image to click not found within {step.params['timeout']}s: {step.params['template']}")
+        await self.offload(partial(pyautogui.click, match.x, match.y, button=step.params["button"]))
+        self.report(f"Clicked image at ({match.x}, {match.y})")
+
+
+def offloaded(func):
+    """Coroutine handler that runs the blocking handler func on the engine's pool"""
+    async def run_offloaded(engine, step):
+        return await engine.offload(func, engine, step)
+    return run_offloaded
+
+
+# Handlers of AsyncExecutionEngine: the coroutine ones, and the blocking
+# ones of ExecutionEngine offloaded for every other action type
+ENGINE_HANDLERS = {action_type: offloaded(func) for action_type, func in ACTION_HANDLERS.items()}
+ENGINE_HANDLERS.update(ASYNC_HANDLERS)
+
+
+async def run_workflows(workflows, concurrency=100, **options):
+    """Run workflows concurrently, at most concurrency at a time.
+
+    options are passed to each AsyncExecutionEngine. Returns the
+    (success, message) of each workflow, in order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(workflow):
+        async with semaphore:
+            return await AsyncExecutionEngine(workflow, **options).run()
+
+    return await asyncio.gather(*(run_one(workflow) for workflow in workflows))
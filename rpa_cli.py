@@ -0,0 +1,203 @@
+"""Run saved workflows from the command line, without the Qt GUI.
+
+Examples:
+    python rpa_cli.py --list
+    python rpa_cli.py "Daily export"
+    python rpa_cli.py exported_workflow.json --delay 0 --loop 3
+    python rpa_cli.py "Fill forms" --var customer=ACME --jsonl --headless
+    python rpa_cli.py "Daily export" --profile profile.csv
+    python rpa_cli.py "Recorded session" --replay 2
+
+Exit status is 0 when the workflow completes, 1 when it fails, 2 when
+the workflow or its arguments can't be loaded and 130 when it is stopped
+with Ctrl+C.
+"""
+import argparse
+import json
+import signal
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+from rpa_engine import ExecutionEngine, EventSink, DRIVER_POOL, REPLAY_MIN_GAP, REPLAY_MAX_GAP
+from rpa_storage import WorkflowStore
+
+
+def default_library():
+    """The GUI's workflow store, or workflows.json from older versions"""
+    if (Path("workflows") / "index.json").exists():
+        return "workflows"
+    return "workflows.json"
+
+
+def iter_library(library):
+    """Yield (name, load) for each workflow in a store directory or workflows.json"""
+    path = Path(library)
+    if path.is_dir():
+        store = WorkflowStore(path)
+        for entry in store.list():
+            yield entry["name"], partial(store.get, entry["id"])
+    elif path.is_file():
+        with open(path, 'r') as f:
+            workflows = json.load(f)
+        for workflow in workflows:
+            yield workflow["name"], partial(dict, workflow)
+    else:
+        raise ValueError(f"Workflow library not found: {library}")
+
+
+def load_workflow(target, library):
+    """Load an exported workflow file, or a workflow from the library by name"""
+    path = Path(target)
+    if path.is_file():
+        with open(path, 'r') as f:
+            workflow = json.load(f)
+        if not isinstance(workflow, dict) or "actions" not in workflow:
+            raise ValueError(f"{target} is not a workflow file; pass a workflow name and --library {target}")
+        return workflow
+    for name, load in iter_library(library):
+        if name == target:
+            return load()
+    raise ValueError(f"No workflow named '{target}' in {library}")
+
+
+def replay_speed(value):
+    """--replay argument: a speed factor, or "max" for as fast as possible"""
+    if value == "max":
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive, or 'max'")
+    return speed
+
+
+def parse_variables(args):
+    """Initial variables from --vars-file and --var NAME=VALUE"""
+    variables = {}
+    if args.vars_file:
+        with open(args.vars_file, 'r') as f:
+            variables.update(json.load(f))
+    for assignment in args.var:
+        name, sep, value = assignment.partition("=")
+        if not sep or not name:
+            raise ValueError(f"--var expects NAME=VALUE, got '{assignment}'")
+        variables[name] = value
+    return variables
+
+
+class Reporter(EventSink):
+    """Event sink that prints engine events as plain text or as JSON lines"""
+
+    def __init__(self, jsonl=False, stream=None):
+        self.jsonl = jsonl
+        self.stream = stream or sys.stdout
+        self.started = None
+
+    def emit(self, event, text, **fields):
+        if self.jsonl:
+            record = {"event": event, "time": round(time.time(), 3), **fields}
+            line = json.dumps(record, default=str)
+        else:
+            line = text
+        print(line, file=self.stream, flush=True)
+
+    def on_start(self, name):
+        self.started = time.monotonic()
+        self.emit("start", f"Starting execution of '{name}'...", workflow=name)
+
+    def on_progress(self, message):
+        self.emit("progress", message, message=message)
+
+    def on_screenshot(self, path):
+        self.emit("screenshot", f"Screenshot saved: {path}", path=path)
+
+    def on_complete(self, success, message):
+        duration = time.monotonic() - self.started
+        self.emit(
+            "complete", f"{message} ({duration:.1f}s)",
+            success=success, message=message, duration=round(duration, 3)
+        )
+
+
+def print_hotspots(profiler, limit=10):
+    """Table of the slowest steps of a profiled run"""
+    print(f"\n{'step':<10} {'action':<14} {'runs':>6} {'total s':>9} {'wait s':>9} {'busy s':>9} {'retries':>7}")
+    for stats in profiler.hotspots(limit):
+        print(f"{stats.key:<10} {stats.action_type:<14} {stats.calls:>6} {stats.wall:>9.3f} "
+              f"{stats.wait:>9.3f} {stats.wall - stats.wait:>9.3f} {stats.retries:>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a saved RPA workflow without the GUI.")
+    parser.add_argument("workflow", nargs="?", help="workflow name, or path to an exported workflow .json file")
+    parser.add_argument("--library", default=None,
+                        help="workflow store directory or workflows.json (default: the GUI's library)")
+    parser.add_argument("--list", action="store_true", help="list the workflows in the library and exit")
+    parser.add_argument("--delay", type=float, default=0.5, help="maximum delay between actions in seconds")
+    parser.add_argument("--fixed-delay", action="store_true", help="always wait the full delay (no adaptive pacing)")
+    parser.add_argument("--loop", type=int, default=1, help="run the workflow this many times")
+    parser.add_argument("--var", action="append", default=[], metavar="NAME=VALUE",
+                        help="set a variable before the run (repeatable)")
+    parser.add_argument("--vars-file", help="JSON object of variables to set before the run")
+    parser.add_argument("--headless", action="store_true", help="run the browser without a window")
+    parser.add_argument("--jsonl", action="store_true", help="print progress as JSON lines")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="record per-step timings and save them to FILE (.json or .csv)")
+    parser.add_argument("--replay", type=replay_speed, metavar="SPEED",
+                        help="replay the recorded timing between steps, SPEED times faster (or 'max')")
+    parser.add_argument("--replay-min", type=float, default=REPLAY_MIN_GAP, metavar="SECONDS",
+                        help=f"shortest pause between replayed steps (default {REPLAY_MIN_GAP})")
+    parser.add_argument("--replay-max", type=float, default=REPLAY_MAX_GAP, metavar="SECONDS",
+                        help=f"longest pause between replayed steps (default {REPLAY_MAX_GAP})")
+    args = parser.parse_args(argv)
+
+    library = args.library or default_library()
+    reporter = Reporter(args.jsonl)
+
+    try:
+        if args.list:
+            for name, _ in iter_library(library):
+                print(name)
+            return 0
+        if not args.workflow:
+            parser.error("a workflow name or file is required")
+        workflow = load_workflow(args.workflow, library)
+        variables = parse_variables(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if args.loop > 1:
+        workflow = {
+            "name": workflow.get("name", ""),
+            "actions": [{
+                "type": "loop",
+                "iterations": args.loop,
+                "actions": workflow["actions"]
+            }]
+        }
+
+    workflow.setdefault("name", args.workflow)
+    engine = ExecutionEngine(
+        workflow, args.delay, not args.fixed_delay, args.headless, variables, sink=reporter,
+        profile=bool(args.profile), replay_speed=args.replay, replay_gaps=(args.replay_min, args.replay_max)
+    )
+    # Ctrl+C stops the run cleanly: partial output is saved, browsers quit
+    signal.signal(signal.SIGINT, lambda signum, frame: engine.cancel())
+    try:
+        success, message = engine.run()
+    finally:
+        # Nothing will reuse the browser after this process exits
+        DRIVER_POOL.shutdown()
+    if args.profile:
+        engine.profiler.export(args.profile)
+        if not args.jsonl:
+            print_hotspots(engine.profiler)
+    if engine.cancelled:
+        return 130
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1693 @@
+"""Workflow execution engine.
+
+Compiles workflows into execution plans and runs them. Nothing here
+imports Qt, so the same engine backs the GUI (RPA2.py) and the
+command-line runner (rpa_cli.py).
+"""
+import csv
+import gc
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from rpa_storage import write_json_atomic
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access.
+
+    pandas, openpyxl, Selenium, pyautogui and pynput are only needed once
+    an action or the recorder uses them, so they are not imported at
+    startup or when the engine module is loaded.
+    """
+    loaded = []
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+            LazyModule.loaded.append(self._name)
+        return getattr(self._module, attr)
+
+
+pyautogui = LazyModule("pyautogui")
+
+pd = LazyModule("pandas")
+openpyxl = LazyModule("openpyxl")
+webdriver = LazyModule("selenium.webdriver")
+EC = LazyModule("selenium.webdriver.support.expected_conditions")
+selenium_exceptions = LazyModule("selenium.common.exceptions")
+# Template matching for the image actions; pulls in NumPy and Pillow
+vision = LazyModule("rpa_vision")
+
+
+# Selenium locator strategy for each selector type offered in ActionDialog
+# (the values of selenium's By constants, so Selenium needn't be imported)
+SELECTOR_TYPES = {
+    "id": "id",
+    "name": "name",
+    "xpath": "xpath",
+    "css": "css selector",
+    "class": "class name"
+}
+
+# Parameter defaults applied when a workflow is compiled
+ACTION_DEFAULTS = {
+    "click": {"button": "left"},
+    "mouse_move": {"duration": 0.5},
+    "key": {},
+    "type_text": {"interval": 0.01},
+    "wait": {"duration": 2},
+    "screenshot": {},
+    "if_condition": {"condition": ""},
+    "loop": {"iterations": 1, "actions": []},
+    "for_each_row": {
+        "file_path": "", "sheet_name": "", "data_variable": "", "row_variable": "row",
+        "start_row": 0, "checkpoint_file": "", "result_file": "", "result_variables": [],
+        "batch_size": 100, "actions": []
+    },
+    "web_navigate": {"url": ""},
+    "web_click": {"selector_type": "id", "selector": ""},
+    "web_type": {"selector_type": "id", "selector": "", "text": ""},
+    "web_extract": {"selector_type": "id", "selector": "", "variable": "extracted_data"},
+    "excel_read": {
+        "file_path": "", "sheet_name": "Sheet1", "variable": "excel_data", "usecols": [],
+        "header_row": 1, "start_row": 0, "max_rows": 0, "read_only": True, "cache": True
+    },
+    "excel_write": {"file_path": "", "sheet_name": "Sheet1", "data_variable": "", "mode": "replace_sheet"},
+    "csv_read": {"file_path": "", "variable": "csv_data", "usecols": [], "dtype": "", "chunk_size": 0},
+    "csv_write": {"file_path": "", "data_variable": "", "mode": "write"},
+    "find_image": {"template": "", "region": [], "confidence": 0.9, "scales": [1.0], "variable": "image_match"},
+    "click_image": {"template": "", "region": [], "confidence": 0.9, "scales": [1.0], "button": "left", "timeout": 10},
+    "wait_for_image": {
+        "template": "", "region": [], "confidence": 0.9, "scales": [1.0], "timeout": 10, "variable": "image_match"
+    }
+}
+
+# Parameters an action cannot run without
+REQUIRED_PARAMS = {
+    "click": ("x", "y"),
+    "mouse_move": ("x", "y"),
+    "key": ("key",),
+    "type_text": ("text",),
+    "find_image": ("template",),
+    "click_image": ("template",),
+    "wait_for_image": ("template",)
+}
+
+# Parameters every compiled step of a type has: its defaults plus the
+# required ones. An action with all of them is used as its own params
+STEP_KEYS = {
+    action_type: frozenset(defaults).union(REQUIRED_PARAMS.get(action_type, ()))
+    for action_type, defaults in ACTION_DEFAULTS.items()
+}
+
+# How long to pause after each action type. "none" continues at once,
+# "screen" waits for the screen around the action (all of it for keyboard
+# actions) to stop changing and "dom" waits for the browser page to finish
+# loading; both are bounded by the configured delay.
+PACING_POLICIES = {
+    "click": "screen",
+    "mouse_move": "screen",
+    "key": "screen",
+    "type_text": "screen",
+    "wait": "none",
+    "screenshot": "none",
+    "if_condition": "none",
+    "loop": "none",
+    "for_each_row": "none",
+    "web_navigate": "dom",
+    "web_click": "dom",
+    "web_type": "dom",
+    "web_extract": "none",
+    "excel_read": "none",
+    "excel_write": "none",
+    "csv_read": "none",
+    "csv_write": "none",
+    "find_image": "none",
+    "click_image": "screen",
+    "wait_for_image": "none"
+}
+
+# Actions that drive the physical mouse, keyboard or screen
+DESKTOP_ACTIONS = {
+    "click", "mouse_move", "key", "type_text", "screenshot", "find_image", "click_image", "wait_for_image"
+}
+
+# Actions that load the rows a parallel run is split over, and that write results
+DATA_SOURCE_ACTIONS = {"csv_read", "excel_read"}
+DATA_SINK_ACTIONS = {"csv_write", "excel_write"}
+
+# Actions whose "actions" list is compiled and run as a nested plan
+CONTAINER_ACTIONS = {"loop", "for_each_row"}
+
+# ${name} or ${name.field} placeholders in string parameters
+TEMPLATE_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+# Rows are pulled from data sources this many at a time
+ROW_CHUNK_SIZE = 1000
+
+# How long web actions wait for their element, and how often they look
+ELEMENT_TIMEOUT = 10
+ELEMENT_POLL_INTERVAL = 0.5
+
+# How often wait_for_image and click_image look at the screen again
+IMAGE_POLL_INTERVAL = 0.25
+
+# Bounds on the pause between recorded steps when replaying their timing
+REPLAY_MIN_GAP = 0.02
+REPLAY_MAX_GAP = 5.0
+
+# Compiled plans kept in memory, per saved workflow (see PlanCache), and
+# the most top-level steps they may hold in total
+PLAN_CACHE_SIZE = 16
+PLAN_CACHE_STEPS = 200_000
+
+# Parsed Excel sheets are cached here, keyed by file and read options
+EXCEL_CACHE_DIR = Path(".rpa_cache")
+
+# Action type -> handler function, filled in by @action_handler
+ACTION_HANDLERS = {}
+
+
+def action_handler(action_type):
+    """Register an ExecutorThread method as the handler for an action type"""
+    def register(func):
+        ACTION_HANDLERS[action_type] = func
+        return func
+    return register
+
+
+def is_web_only(actions):
+    """True if no action, including nested ones, needs the desktop"""
+    for action in actions:
+        if action.get("type") in DESKTOP_ACTIONS:
+            return False
+        if not is_web_only(action.get("actions", [])):
+            return False
+    return True
+
+
+def source_variable(action):
+    """Variable a CSV/Excel read stores its data in"""
+    return action.get("variable") or ACTION_DEFAULTS[action["type"]]["variable"]
+
+
+def is_file_loop(action):
+    """True for a for_each_row that reads its rows from a file itself"""
+    return action.get("type") == "for_each_row" and bool(action.get("file_path"))
+
+
+def has_file_loop(actions):
+    """True if actions, or any actions nested in them, contain a file-reading for_each_row"""
+    return any(is_file_loop(action) or has_file_loop(action.get("actions", [])) for action in actions)
+
+
+def find_data_source(actions):
+    """Return (index, action) of the top-level action whose rows a parallel run splits, or (-1, None).
+
+    That is the first top-level CSV/Excel read or file-reading
+    for_each_row. (-1, None) is also returned if any other for_each_row
+    reads a file, since every worker would process all of its rows.
+    """
+    for i, action in enumerate(actions):
+        if action.get("type") in DATA_SOURCE_ACTIONS or is_file_loop(action):
+            others = actions[:i] + actions[i + 1:] + action.get("actions", [])
+            if has_file_loop(others):
+                return -1, None
+            return i, action
+    return -1, None
+
+
+class PlanStep:
+    """A compiled workflow action: registered handler plus defaulted parameters.
+
+    handler is the unbound method from the engine's handler registry, so
+    a plan can be run by any engine with that registry and cached.
+    """
+    __slots__ = ("action_type", "handler", "params", "number", "total", "children", "pacing", "templates",
+                 "prefix", "gap", "text")
+
+    def __init__(self, action_type, handler, params, number, total, children=None, pacing="screen",
+                 templates=(), prefix="", gap=None):
+        self.action_type = action_type
+        self.handler = handler
+        self.params = params
+        # Position among the steps of its own (nested) plan, for the label
+        self.number = number
+        self.total = total
+        self.children = children
+        self.pacing = pacing
+        # Names of string parameters containing ${...} placeholders
+        self.templates = templates
+        # Path of the parent step plus ".", shared by the steps of a nested plan
+        self.prefix = prefix
+        # Recorded seconds until the next action, for timed replay
+        self.gap = gap
+        self.text = None
+
+    @property
+    def label(self):
+        """"Executing step i/n: type", formatted the first time it is shown"""
+        if self.text is None:
+            self.text = f"Executing step {self.number}/{self.total}: {self.action_type}"
+        return self.text
+
+    @property
+    def path(self):
+        """Position in the workflow, e.g. "3.2" for the 2nd action of the 3rd"""
+        return f"{self.prefix}{self.number}"
+
+
+def recorded_gaps(actions):
+    """Seconds between each action's recorded timestamp and the next one's.
+
+    None where either action has no (valid) timestamp, and for the last
+    action.
+    """
+    times = []
+    for action in actions:
+        try:
+            times.append(datetime.fromisoformat(action["timestamp"]).timestamp())
+        except (KeyError, TypeError, ValueError):
+            times.append(None)
+    gaps = [None] * len(actions)
+    for i in range(len(actions) - 1):
+        if times[i] is not None and times[i + 1] is not None:
+            gaps[i] = max(0.0, times[i + 1] - times[i])
+    return gaps
+
+
+def compile_plan(actions, handlers, timed=False):
+    """Compile workflow actions into a list of PlanSteps.
+
+    Handlers are looked up once per step, parameters are defaulted and
+    web selectors are resolved to Selenium locators up front, so that
+    running the plan does no per-step branching. An action that already
+    has every parameter is shared with its step rather than copied.
+    Nested loop actions are compiled recursively. With timed, each step
+    also gets its recorded gap to the next step. Raises ValueError for an
+    invalid workflow.
+    """
+    # Every step allocates a few objects, which on large workflows would
+    # set off repeated full garbage collections; nothing here is cyclic
+    collect = gc.isenabled()
+    gc.disable()
+    try:
+        return compile_steps(actions, handlers, "", timed)
+    finally:
+        if collect:
+            gc.enable()
+
+
+def compile_steps(actions, handlers, prefix, timed):
+    """compile_plan() for the actions at one nesting level; prefix is their parent's path plus "." """
+    plan = []
+    append = plan.append
+    total = len(actions)
+    gaps = recorded_gaps(actions) if timed else None
+    number = 0
+    for action in actions:
+        number += 1
+        action_type = action.get("type")
+        handler = handlers.get(action_type)
+        if handler is None:
+            raise ValueError(f"Step {prefix}{number}: unknown action type '{action_type}'")
+
+        if action.keys() >= STEP_KEYS[action_type] and "selector_type" not in action:
+            params = action
+        else:
+            required = REQUIRED_PARAMS.get(action_type)
+            if required:
+                missing = [name for name in required if name not in action]
+                if missing:
+                    raise ValueError(f"Step {prefix}{number} ({action_type}): missing {', '.join(missing)}")
+            params = {**ACTION_DEFAULTS[action_type], **action}
+            if "selector_type" in params:
+                params["by"] = SELECTOR_TYPES.get(params["selector_type"], "id")
+
+        children = None
+        if action_type in CONTAINER_ACTIONS:
+            children = compile_steps(params["actions"], handlers, f"{prefix}{number}.", timed)
+
+        # Defaults never contain placeholders; only the action's own strings can
+        templates = ()
+        for value in action.values():
+            if type(value) is str and "${" in value:
+                templates = tuple(name for name, value in action.items() if type(value) is str and "${" in value)
+                break
+
+        append(PlanStep(
+            action_type, handler, params, number, total, children, PACING_POLICIES.get(action_type, "screen"),
+            templates, prefix, gaps[number - 1] if timed else None
+        ))
+    return plan
+
+
+class PlanCache:
+    """LRU cache of compiled plans for saved workflows.
+
+    Workflows in the WorkflowStore are never changed once saved (an
+    edited workflow is saved under a new id), so a workflow's id
+    identifies its version and its plan can be reused by every later run
+    of it, in any engine with the same handler registry. Workflows
+    without an id (loaded from a file, or built on the fly) are compiled
+    on every run, and so are plans too large to keep.
+    """
+
+    def __init__(self, max_size=PLAN_CACHE_SIZE, max_steps=PLAN_CACHE_STEPS):
+        self.max_size = max_size
+        self.max_steps = max_steps
+        self.steps = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, workflow, handlers, timed=False):
+        """Plan of workflow's actions, compiled on first use"""
+        actions = workflow.get("actions", [])
+        workflow_id = workflow.get("id")
+        if not workflow_id:
+            return compile_plan(actions, handlers, timed=timed)
+        key = (workflow_id, id(handlers), timed)
+        with self.lock:
+            plan = self.entries.get(key)
+            if plan is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        plan = compile_plan(actions, handlers, timed=timed)
+        if len(plan) > self.max_steps:
+            return plan
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = plan
+                self.steps += len(plan)
+            while len(self.entries) > self.max_size or self.steps > self.max_steps:
+                self.steps -= len(self.entries.popitem(last=False)[1])
+        return plan
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.steps = 0
+
+
+PLAN_CACHE = PlanCache()
+
+
+def clean_value(value):
+    """Map missing cells (None/NaN) to empty strings"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return value
+
+
+def stream_rows(file_path, sheet_name="", start=0):
+    """Yield the rows of a CSV or Excel file as dicts, from row index start.
+
+    Files are read ROW_CHUNK_SIZE rows at a time (CSV) or through a
+    read-only openpyxl workbook (Excel), so memory use doesn't grow with
+    the file. CSV values are kept as strings so that e.g. leading zeros
+    survive being typed into a form.
+    """
+    if Path(file_path).suffix.lower() in (".xlsx", ".xlsm"):
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook[sheet_name] if sheet_name else workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [
+                str(name) if name is not None else f"column{i+1}"
+                for i, name in enumerate(header)
+            ]
+            for values in itertools.islice(rows, start, None):
+                yield {column: clean_value(value) for column, value in zip(columns, values)}
+        finally:
+            workbook.close()
+    else:
+        reader = pd.read_csv(
+            file_path, dtype=str, keep_default_na=False,
+            skiprows=range(1, start + 1), chunksize=ROW_CHUNK_SIZE
+        )
+        with reader:
+            for chunk in reader:
+                yield from chunk.to_dict("records")
+
+
+class ChunkedCSV:
+    """Lazy CSV source stored in a variable by a chunked csv_read.
+
+    Iterating yields DataFrames of at most chunk_size rows, read from
+    disk as they are consumed, so only one chunk is in memory at a time.
+    It can be iterated more than once; each pass re-reads the file.
+    """
+
+    def __init__(self, file_path, chunk_size, **read_options):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.read_options = read_options
+
+    def __iter__(self):
+        with pd.read_csv(self.file_path, chunksize=self.chunk_size, **self.read_options) as reader:
+            yield from reader
+
+    def __repr__(self):
+        return f"<CSV {self.file_path} in chunks of {self.chunk_size} rows>"
+
+
+def iter_data_rows(data, start=0):
+    """Yield the rows of a DataFrame or ChunkedCSV as dicts, from row index start"""
+    if isinstance(data, ChunkedCSV):
+        chunks = iter(data)
+    else:
+        chunks = (data.iloc[offset:offset + ROW_CHUNK_SIZE] for offset in range(0, len(data), ROW_CHUNK_SIZE))
+    seen = 0
+    for chunk in chunks:
+        skip = max(0, start - seen)
+        seen += len(chunk)
+        if skip >= len(chunk):
+            continue
+        for record in chunk.iloc[skip:].to_dict("records"):
+            yield {column: clean_value(value) for column, value in record.items()}
+
+
+def read_excel_sheet(file_path, sheet_name="", usecols=None, header_row=1,
+                     start_row=0, max_rows=0, read_only=True):
+    """Read one sheet into a DataFrame.
+
+    header_row is the 1-based row holding the column names, start_row
+    the number of data rows below it to skip and max_rows (0 = all) how
+    many to read. In read_only mode openpyxl streams the rows instead of
+    building the whole workbook, and only the selected columns are kept.
+    """
+    if not read_only:
+        return pd.read_excel(
+            file_path,
+            sheet_name=sheet_name or 0,
+            usecols=usecols or None,
+            header=header_row - 1,
+            skiprows=range(header_row, header_row + start_row) if start_row else None,
+            nrows=max_rows or None
+        )
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = sheet.iter_rows(min_row=header_row, values_only=True)
+        header = next(rows, None) or ()
+        columns = [
+            str(name) if name is not None else f"column{i+1}"
+            for i, name in enumerate(header)
+        ]
+        if usecols:
+            missing = [name for name in usecols if name not in columns]
+            if missing:
+                raise ValueError(f"Columns not found: {', '.join(missing)}")
+            indices = [columns.index(name) for name in usecols]
+        else:
+            indices = list(range(len(columns)))
+
+        stop = start_row + max_rows if max_rows else None
+        width = len(columns)
+        records = []
+        for values in itertools.islice(rows, start_row, stop):
+            if len(values) < width:
+                values = tuple(values) + (None,) * (width - len(values))
+            records.append([values[i] for i in indices])
+        return pd.DataFrame(records, columns=[columns[i] for i in indices])
+    finally:
+        workbook.close()
+
+
+def cached_excel_read(file_path, **options):
+    """read_excel_sheet() backed by an on-disk columnar cache.
+
+    The cache file name combines a hash of the path and read options
+    with the workbook's mtime and size, so editing the workbook
+    invalidates it. Feather (pyarrow) is used when available, pickle
+    otherwise. Returns (DataFrame, True if served from the cache).
+    """
+    stat = os.stat(file_path)
+    key_source = json.dumps([str(Path(file_path).resolve()), options], sort_keys=True, default=str)
+    prefix = hashlib.sha1(key_source.encode()).hexdigest()[:16]
+    try:
+        import pyarrow  # noqa: F401
+        suffix = ".feather"
+    except ImportError:
+        suffix = ".pkl"
+    cache_file = EXCEL_CACHE_DIR / f"{prefix}-{stat.st_mtime_ns}-{stat.st_size}{suffix}"
+
+    if cache_file.exists():
+        try:
+            if suffix == ".feather":
+                return pd.read_feather(cache_file), True
+            return pd.read_pickle(cache_file), True
+        except Exception:
+            # Corrupt or unreadable entry; parse the workbook again
+            pass
+
+    df = read_excel_sheet(file_path, **options)
+
+    EXCEL_CACHE_DIR.mkdir(exist_ok=True)
+    for stale in EXCEL_CACHE_DIR.glob(f"{prefix}-*"):
+        stale.unlink(missing_ok=True)
+    tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+    try:
+        if suffix == ".feather":
+            # Feather needs string column names and a default index
+            df.rename(columns=str).to_feather(tmp_file)
+        else:
+            df.to_pickle(tmp_file)
+        os.replace(tmp_file, cache_file)
+    except Exception:
+        # Mixed-type columns can't always be stored; just skip caching
+        tmp_file.unlink(missing_ok=True)
+    return df, False
+
+
+def clean_cell(value):
+    """Map missing values (None/NaN/NaT) to empty Excel cells"""
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value
+
+
+class ExcelWriterSession:
+    """Collects the excel_write output for one workbook during a run.
+
+    The workbook is opened on the first write and saved once when the run
+    ends, instead of being rewritten by every excel_write. A new file is
+    built in openpyxl write-only mode, which streams rows to temporary
+    files; an existing one is loaded once so its other sheets are kept.
+    Those sheets are still read and rewritten in full by save(), and
+    anything openpyxl can't load (charts, images) is dropped.
+    """
+
+    def __init__(self, file_path, fresh=False):
+        self.file_path = Path(file_path)
+        self.write_only = fresh or not self.file_path.exists()
+        if self.write_only:
+            self.workbook = openpyxl.Workbook(write_only=True)
+        else:
+            self.workbook = openpyxl.load_workbook(self.file_path)
+        # Sheets that already have a header row from this session
+        self.started = set()
+        self.rows_written = 0
+
+    def write(self, data, sheet_name, mode="replace_sheet"):
+        """Add a DataFrame or ChunkedCSV to a sheet; returns the row count"""
+        sheet_name = sheet_name or "Sheet1"
+        sheet = self.get_sheet(sheet_name, replace=mode != "append")
+        chunks = data if isinstance(data, ChunkedCSV) else [data]
+        rows = 0
+        for chunk in chunks:
+            if sheet_name not in self.started:
+                sheet.append([str(column) for column in chunk.columns])
+                self.started.add(sheet_name)
+            for values in chunk.itertuples(index=False, name=None):
+                sheet.append([clean_cell(value) for value in values])
+            rows += len(chunk)
+        self.rows_written += rows
+        return rows
+
+    def get_sheet(self, name, replace):
+        workbook = self.workbook
+        if name not in workbook.sheetnames:
+            return workbook.create_sheet(name)
+        sheet = workbook[name]
+        if replace:
+            index = workbook.sheetnames.index(name)
+            if self.write_only:
+                # Finish the sheet's row stream first; dropping it while
+                # open makes openpyxl write to a closed temporary file
+                sheet.close()
+            workbook.remove(sheet)
+            self.started.discard(name)
+            return workbook.create_sheet(name, index)
+        if name not in self.started and not self.write_only:
+            if sheet.max_row > 1 or sheet.cell(1, 1).value is not None:
+                # Appending below rows saved by an earlier run
+                self.started.add(name)
+        return sheet
+
+    def save(self):
+        """Write the workbook to a temporary file and rename it over the target"""
+        if not self.workbook.sheetnames:
+            self.workbook.create_sheet("Sheet1")
+        tmp_path = self.file_path.with_name(self.file_path.name + ".tmp")
+        self.workbook.save(tmp_path)
+        os.replace(tmp_path, self.file_path)
+
+
+class Pacer:
+    """Pauses between workflow steps according to PACING_POLICIES.
+
+    With adaptive pacing off every step sleeps the full delay, as before.
+    With it on, the delay becomes an upper bound: non-UI steps do not
+    wait at all and UI steps return as soon as their readiness condition
+    holds. The time saved against the fixed delay is accumulated.
+    """
+    POLL_INTERVAL = 0.05
+    REGION_SIZE = 100
+    # Whether plans need their recorded gaps (see compile_plan)
+    timed = False
+
+    def __init__(self, executor, delay, adaptive=True):
+        self.executor = executor
+        self.delay = delay
+        self.adaptive = adaptive
+        self.saved = 0.0
+        self.waiters = {
+            "screen": self.wait_screen_stable,
+            "dom": self.wait_dom_ready
+        }
+
+    @property
+    def active(self):
+        """False if after_step() would never pause, so runs can skip it"""
+        return self.delay > 0 or self.timed
+
+    def after_step(self, step):
+        """Pause after a step has run"""
+        if not self.adaptive:
+            self.executor.sleep(self.delay)
+            return
+        if step.pacing == "none" or self.delay <= 0:
+            self.saved += self.delay
+            return
+        start = time.monotonic()
+        self.waiters[step.pacing](step, start + self.delay)
+        self.saved += max(0.0, self.delay - (time.monotonic() - start))
+
+    def screen_region(self, step):
+        """Region wait_screen_stable watches for step, or None for the whole screen.
+
+        That is the square around the step's x/y, or the step's own
+        region. Steps without either, such as key presses and typing,
+        can change the screen anywhere, so the whole screen is watched.
+        """
+        params = step.params
+        if "x" in params and "y" in params:
+            half = self.REGION_SIZE // 2
+            return (max(0, params["x"] - half), max(0, params["y"] - half), self.REGION_SIZE, self.REGION_SIZE)
+        if params.get("region"):
+            return tuple(params["region"])
+        return None
+
+    def wait_screen_stable(self, step, deadline):
+        """Wait until two consecutive grabs of the step's screen region match"""
+        region = self.screen_region(step)
+        previous = None
+        while time.monotonic() < deadline:
+            try:
+                current = pyautogui.screenshot(region=region).tobytes()
+            except Exception:
+                # Can't observe the screen; fall back to the fixed delay
+                self.executor.sleep(max(0.0, deadline - time.monotonic()))
+                return
+            if current == previous:
+                return
+            previous = current
+            self.executor.sleep(min(self.POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+
+    def wait_dom_ready(self, step, deadline):
+        """Wait until the browser reports the document as loaded"""
+        driver = self.executor.driver
+        if driver is None:
+            return
+        while time.monotonic() < deadline:
+            try:
+                if driver.execute_script("return document.readyState") == "complete":
+                    return
+            except Exception:
+                return
+            self.executor.sleep(min(self.POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+
+
+class ReplayPacer(Pacer):
+    """Pacer that reproduces the recorded timing between steps.
+
+    The recorded gap after each step is divided by speed (0 replays as
+    fast as possible) and clamped to [min_gap, max_gap]. Pauses sleep
+    until a deadline on a monotonic schedule rather than for a duration,
+    so the time steps themselves take, and oversleeping, don't add up
+    over a long recording; the schedule is only restarted when the run
+    falls more than max_gap behind (after a pause, or a slow page).
+    Steps without a recorded gap (added by hand, or the last of a loop)
+    are paced like Pacer paces them.
+    """
+    timed = True
+
+    def __init__(self, executor, delay, adaptive=True, speed=1.0, min_gap=REPLAY_MIN_GAP,
+                 max_gap=REPLAY_MAX_GAP):
+        super().__init__(executor, delay, adaptive)
+        self.speed = speed
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        # When the step that just ran was due to start, on perf_counter's clock
+        self.scheduled = None
+
+    def after_step(self, step):
+        """Pause until the next step is due"""
+        if step.gap is None:
+            super().after_step(step)
+            self.scheduled = None
+            return
+        gap = step.gap / self.speed if self.speed > 0 else 0.0
+        gap = min(max(gap, self.min_gap), self.max_gap)
+        now = time.perf_counter()
+        if self.scheduled is None or now - (self.scheduled + gap) > self.max_gap:
+            self.scheduled = now
+        self.scheduled += gap
+        remaining = self.scheduled - now
+        if remaining > 0:
+            self.executor.sleep(remaining)
+
+
+class DriverPool:
+    """Process-wide pool of reusable Selenium WebDriver sessions.
+
+    Starting a browser takes seconds, so instead of quitting the driver
+    at the end of a run it is reset (its tabs replaced by one blank tab,
+    cookies and the storage of the sites the run visited cleared) and
+    kept warm for the next run.
+    Idle drivers are health checked before reuse and quit once they have
+    been idle longer than max_idle seconds.
+    """
+
+    def __init__(self, max_size=2, max_idle=300.0, factory=None):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.factory = factory or self.create_driver
+        self.idle = []  # [driver, headless, released_at], oldest first
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def create_driver(headless=False):
+        """Start a new Chrome session"""
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        return webdriver.Chrome(options=options)
+
+    def acquire(self, headless=False):
+        """Borrow a healthy driver, starting a new one if none is idle"""
+        self.evict_idle()
+        while True:
+            with self.lock:
+                entry = None
+                for i in range(len(self.idle) - 1, -1, -1):
+                    if self.idle[i][1] == headless:
+                        entry = self.idle.pop(i)
+                        break
+            if entry is None:
+                return self.factory(headless)
+            if self.is_healthy(entry[0]):
+                return entry[0]
+            self.quit_driver(entry[0])
+
+    def release(self, driver, headless=False, origins=()):
+        """Return a borrowed driver to the pool; origins are those the run navigated to"""
+        if not self.reset(driver, origins):
+            self.quit_driver(driver)
+            return
+        with self.lock:
+            self.idle.append([driver, headless, time.monotonic()])
+            overflow = self.idle[:-self.max_size] if self.max_size > 0 else list(self.idle)
+            del self.idle[:len(overflow)]
+        for entry in overflow:
+            self.quit_driver(entry[0])
+
+    def evict_idle(self):
+        """Quit drivers that have been idle longer than max_idle"""
+        cutoff = time.monotonic() - self.max_idle
+        with self.lock:
+            expired = [entry for entry in self.idle if entry[2] < cutoff]
+            self.idle = [entry for entry in self.idle if entry[2] >= cutoff]
+        for entry in expired:
+            self.quit_driver(entry[0])
+
+    def shutdown(self):
+        """Quit every idle driver"""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for entry in idle:
+            self.quit_driver(entry[0])
+
+    @staticmethod
+    def is_healthy(driver):
+        try:
+            driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def reset(driver, origins=()):
+        """Clear state left behind by the previous run.
+
+        Cookies are cleared for all sites, and storage for each origin in
+        origins or in the navigation history of an open tab, through the
+        Chrome DevTools Protocol. Drivers without it can't be cleared
+        that way and are not reused.
+        """
+        if not hasattr(driver, "execute_cdp_cmd"):
+            return False
+        try:
+            origins = set(origins)
+            handles = driver.window_handles
+            for handle in handles:
+                # Also finds pages reached by redirects and links
+                driver.switch_to.window(handle)
+                history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+                origins.update(url_origin(entry.get("url", "")) for entry in history.get("entries", []))
+            origins.discard(None)
+            # sessionStorage belongs to the tab, so the run's tabs are
+            # replaced by a new one, which opens on about:blank
+            driver.switch_to.new_window("tab")
+            fresh = driver.current_window_handle
+            for handle in handles:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(fresh)
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            for origin in origins:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def quit_driver(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+DRIVER_POOL = DriverPool()
+
+
+def url_origin(url):
+    """scheme://host[:port] of an http(s) URL, or None for other URLs"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    return f"{parts.scheme}://{parts.netloc.rpartition('@')[2].lower()}"
+
+
+class EventSink:
+    """Receives an engine's events; every method is a no-op by default.
+
+    Subclass and override the events you care about. Methods are called
+    on the thread running the engine, so sinks that feed a UI must hand
+    events over to the UI thread themselves.
+    """
+    # Quiet sinks don't get on_step calls
+    quiet = False
+
+    def on_start(self, name):
+        pass
+
+    def on_step(self, label):
+        """Called before each step with its "Executing step ..." label"""
+        self.on_progress(label)
+
+    def on_progress(self, message):
+        pass
+
+    def on_screenshot(self, path):
+        pass
+
+    def on_complete(self, success, message):
+        pass
+
+
+class NullSink(EventSink):
+    """Discards everything and skips per-step messages, for maximum throughput"""
+    quiet = True
+
+
+class CallbackSink(EventSink):
+    """Forwards events to plain functions; any of them may be None"""
+
+    def __init__(self, progress=None, screenshot=None, complete=None):
+        if progress:
+            self.on_progress = progress
+        if screenshot:
+            self.on_screenshot = screenshot
+        if complete:
+            self.on_complete = complete
+
+
+class LoggingSink(EventSink):
+    """Writes events to a logging.Logger"""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("rpa")
+        self.level = level
+
+    def on_start(self, name):
+        self.logger.log(self.level, "Starting execution of '%s'", name)
+
+    def on_progress(self, message):
+        self.logger.log(self.level, "%s", message)
+
+    def on_screenshot(self, path):
+        self.logger.log(self.level, "Screenshot saved: %s", path)
+
+    def on_complete(self, success, message):
+        self.logger.log(self.level if success else logging.ERROR, "%s", message)
+
+
+class ProgressBuffer(EventSink):
+    """Collects progress for a consumer that polls it, e.g. a UI timer.
+
+    Steps are only counted and the latest label kept, so the consumer
+    does no work per step however fast the engine runs. Other messages
+    are queued, keeping the newest max_messages. Several engines may
+    share one buffer.
+    """
+
+    def __init__(self, max_messages=1000):
+        self.messages = deque(maxlen=max_messages)
+        self.lock = threading.Lock()
+        self.steps = 0
+        self.current_step = ""
+
+    def on_step(self, label):
+        with self.lock:
+            self.steps += 1
+            self.current_step = label
+
+    def on_progress(self, message):
+        self.messages.append(message)
+
+    def drain(self):
+        """Messages received since the last drain, oldest first"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.popleft())
+            except IndexError:
+                return messages
+
+
+class QueueSink(EventSink):
+    """Puts (event, *args) tuples on a queue.Queue, asyncio.Queue or similar.
+
+    Lets another thread or process consume events at its own pace: the
+    engine only pays for put_nowait().
+    """
+
+    def __init__(self, queue):
+        self.put = queue.put_nowait
+
+    def on_start(self, name):
+        self.put(("start", name))
+
+    def on_progress(self, message):
+        self.put(("progress", message))
+
+    def on_screenshot(self, path):
+        self.put(("screenshot", path))
+
+    def on_complete(self, success, message):
+        self.put(("complete", success, message))
+
+
+class StepStats:
+    """Totals for one plan step (or one action type) across its runs.
+
+    Times exclude nested steps, so a loop only accounts for its own
+    overhead. wait is time spent sleeping or polling (pacing, wait
+    actions, looking for web elements); the rest of wall is busy time.
+    """
+    __slots__ = ("key", "action_type", "calls", "wall", "wait", "retries", "slowest")
+
+    def __init__(self, key, action_type):
+        self.key = key
+        self.action_type = action_type
+        self.calls = 0
+        self.wall = 0.0
+        self.wait = 0.0
+        self.retries = 0
+        self.slowest = 0.0
+
+    def add(self, wall, wait, retries, calls=1, slowest=None):
+        self.calls += calls
+        self.wall += wall
+        self.wait += wait
+        self.retries += retries
+        self.slowest = max(self.slowest, wall if slowest is None else slowest)
+
+    def as_dict(self):
+        return {
+            "key": self.key,
+            "action_type": self.action_type,
+            "calls": self.calls,
+            "wall": round(self.wall, 6),
+            "wait": round(self.wait, 6),
+            "busy": round(self.wall - self.wait, 6),
+            "retries": self.retries,
+            "mean": round(self.wall / self.calls, 6) if self.calls else 0.0,
+            "max": round(self.slowest, 6)
+        }
+
+
+class StepProfiler:
+    """Collects StepStats per step path while an engine runs with profile=True.
+
+    The engine calls enter() before each step and record() after it;
+    the stack of open steps lets record() subtract nested steps' time
+    from their container.
+    """
+    CSV_FIELDS = ("group", "key", "action_type", "calls", "wall", "wait", "busy", "retries", "mean", "max")
+
+    def __init__(self):
+        self.steps = {}
+        self.stack = []
+
+    def enter(self):
+        self.stack.append([0.0, 0.0, 0])
+
+    def record(self, step, wall, wait, retries):
+        nested_wall, nested_wait, nested_retries = self.stack.pop()
+        if self.stack:
+            parent = self.stack[-1]
+            parent[0] += wall
+            parent[1] += wait
+            parent[2] += retries
+        stats = self.steps.get(step.path)
+        if stats is None:
+            stats = self.steps[step.path] = StepStats(step.path, step.action_type)
+        stats.add(wall - nested_wall, wait - nested_wait, retries - nested_retries)
+
+    def merge(self, other):
+        """Add another profiler's totals, e.g. from a parallel worker"""
+        for path, theirs in other.steps.items():
+            stats = self.steps.get(path)
+            if stats is None:
+                stats = self.steps[path] = StepStats(path, theirs.action_type)
+            stats.add(theirs.wall, theirs.wait, theirs.retries, theirs.calls, theirs.slowest)
+
+    def by_step(self):
+        """Per-step totals in workflow order"""
+        def order(path):
+            return [int(part) for part in path.split(".")]
+        return [self.steps[path] for path in sorted(self.steps, key=order)]
+
+    def by_type(self):
+        """Totals per action type, slowest first"""
+        totals = {}
+        for stats in self.steps.values():
+            total = totals.get(stats.action_type)
+            if total is None:
+                total = totals[stats.action_type] = StepStats(stats.action_type, stats.action_type)
+            total.add(stats.wall, stats.wait, stats.retries, stats.calls, stats.slowest)
+        return sorted(totals.values(), key=lambda total: total.wall, reverse=True)
+
+    def hotspots(self, limit=10):
+        """The limit steps that took the most time"""
+        return sorted(self.steps.values(), key=lambda stats: stats.wall, reverse=True)[:limit]
+
+    def export(self, path):
+        """Write the profile as JSON, or as CSV if path ends in .csv"""
+        groups = {
+            "by_step": [stats.as_dict() for stats in self.by_step()],
+            "by_type": [stats.as_dict() for stats in self.by_type()]
+        }
+        if str(path).lower().endswith(".csv"):
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS)
+                writer.writeheader()
+                for group, rows in groups.items():
+                    for row in rows:
+                        writer.writerow({"group": group, **row})
+        else:
+            with open(path, 'w') as f:
+                json.dump(groups, f, indent=2)
+
+
+class WorkflowCancelled(Exception):
+    """Raised inside a run when ExecutionEngine.cancel() has been called"""
+
+
+class ExecutionEngine:
+    """Executes a workflow; independent of Qt.
+
+    Events go to sink (an EventSink, NullSink by default): a message for
+    every step and notable event, the path of each image taken by a
+    screenshot action, and the start and result of the run. run() blocks
+    until the workflow is done, so callers decide which thread it runs on.
+
+    cancel(), pause() and resume() may be called from any thread. They
+    are checked before every step and during waits and element polling,
+    so a run stops within a few milliseconds unless a single blocking
+    call (a page load, typing a long text) is in progress.
+    """
+
+    def __init__(self, workflow, delay=0.5, adaptive_pacing=True, headless=False, variables=None,
+                 sink=None, profile=False, replay_speed=None, replay_gaps=(REPLAY_MIN_GAP, REPLAY_MAX_GAP)):
+        self.workflow = workflow
+        self.delay = delay
+        self.variables = dict(variables or {})
+        self.driver = None
+        self.headless = headless
+        # Origins web_navigate opened, whose storage is cleared with the driver
+        self.visited_origins = set()
+        # Open Excel outputs, keyed by resolved path, saved when the run ends
+        self.excel_sessions = {}
+        self.sink = sink or NullSink()
+        self.report = self.sink.on_progress
+        self.control = threading.Condition()
+        self.paused = False
+        self.cancelled = False
+        # Per-step timings, when profiling; slept and retries feed it
+        self.profiler = StepProfiler() if profile else None
+        self.slept = 0.0
+        self.retries = 0
+        if replay_speed is None:
+            self.pacer = Pacer(self, delay, adaptive_pacing)
+        else:
+            # Recorded steps keep their recorded timing, scaled by replay_speed
+            self.pacer = ReplayPacer(self, delay, adaptive_pacing, replay_speed, *replay_gaps)
+        # Handlers of this engine class, keyed by action type
+        self.handlers = ACTION_HANDLERS
+        
+    def run(self):
+        """Run the workflow; returns (success, message)"""
+        self.sink.on_start(self.workflow.get("name", ""))
+        try:
+            plan = PLAN_CACHE.get(self.workflow, self.handlers, self.pacer.timed)
+            self.run_plan(plan)
+            self.flush_excel_sessions()
+            result = True, "Workflow completed successfully!"
+            
+        except WorkflowCancelled:
+            result = False, "Execution stopped by user"
+        except Exception as e:
+            result = False, f"Error: {str(e)}"
+        finally:
+            # Keep whatever was written before a failure
+            self.flush_excel_sessions()
+            self.cleanup_selenium()  # ADD THIS
+            # Stopped and failed runs were paced too
+            if self.pacer.adaptive:
+                self.report(
+                    f"Adaptive pacing saved {self.pacer.saved:.1f}s versus a fixed {self.delay}s delay"
+                )
+        self.sink.on_complete(*result)
+        return result
+
+    def cancel(self):
+        """Stop the run at the next step, wait or poll"""
+        with self.control:
+            self.cancelled = True
+            self.control.notify_all()
+
+    def pause(self):
+        """Hold the run before its next step until resume() or cancel()"""
+        with self.control:
+            self.paused = True
+            self.control.notify_all()
+
+    def resume(self):
+        with self.control:
+            self.paused = False
+            self.control.notify_all()
+
+    def check_stop(self):
+        """Raise WorkflowCancelled if cancelled; block here while paused"""
+        if self.paused or self.cancelled:
+            with self.control:
+                while self.paused and not self.cancelled:
+                    self.control.wait()
+                if self.cancelled:
+                    raise WorkflowCancelled()
+
+    def sleep(self, seconds):
+        """time.sleep that is cut short by cancel() and held by pause()"""
+        start = time.monotonic()
+        deadline = start + seconds
+        try:
+            with self.control:
+                while True:
+                    if self.cancelled:
+                        raise WorkflowCancelled()
+                    if self.paused:
+                        self.control.wait()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self.control.wait(remaining)
+        finally:
+            self.slept += time.monotonic() - start
+            
+    def execute_actions(self, actions, loop_count=1):
+        """Execute a list of actions"""
+        self.run_plan(compile_plan(actions, self.handlers, timed=self.pacer.timed), loop_count)
+
+    def run_plan(self, plan, loop_count=1):
+        """Execute a compiled plan"""
+        if self.profiler is not None:
+            self.run_plan_profiled(plan, loop_count)
+            return
+        emit = None if self.sink.quiet else self.sink.on_step
+        pace = self.pacer.after_step if self.pacer.active else None
+        check_stop = self.check_stop
+        for iteration in range(loop_count):
+            for step in plan:
+                if self.paused or self.cancelled:
+                    check_stop()
+                if emit:
+                    emit(step.label)
+                if step.templates:
+                    step = self.render_step(step)
+                step.handler(self, step)
+                if pace:
+                    pace(step)
+
+    def run_plan_profiled(self, plan, loop_count=1):
+        """run_plan, recording every step's timings in self.profiler"""
+        emit = None if self.sink.quiet else self.sink.on_step
+        pace = self.pacer.after_step
+        check_stop = self.check_stop
+        profiler = self.profiler
+        clock = time.perf_counter
+        for iteration in range(loop_count):
+            for step in plan:
+                check_stop()
+                if emit:
+                    emit(step.label)
+                if step.templates:
+                    step = self.render_step(step)
+                profiler.enter()
+                slept, retries = self.slept, self.retries
+                acted = None
+                start = clock()
+                try:
+                    step.handler(self, step)
+                    acted = clock()
+                    paced = self.slept
+                    pace(step)
+                finally:
+                    end = clock()
+                    if acted is not None:
+                        # All of the pacing counts as waiting, polling included.
+                        # It goes into self.slept, so a container's wait and
+                        # its steps' waits come from the same counter
+                        self.slept = paced + end - acted
+                    profiler.record(step, end - start, self.slept - slept, self.retries - retries)
+
+    def render_step(self, step):
+        """Copy of step with ${...} placeholders filled from self.variables"""
+        params = dict(step.params)
+        for name in step.templates:
+            params[name] = TEMPLATE_PATTERN.sub(self.render_placeholder, params[name])
+        return PlanStep(
+            step.action_type, step.handler, params, step.number, step.total, step.children, step.pacing,
+            prefix=step.prefix, gap=step.gap
+        )
+
+    def render_placeholder(self, match):
+        name, *fields = match.group(1).strip().split(".")
+        if name not in self.variables:
+            raise ValueError(f"Unknown variable in {match.group(0)}")
+        value = self.variables[name]
+        for field in fields:
+            try:
+                value = value[field]
+            except (KeyError, IndexError, TypeError):
+                raise ValueError(f"Unknown field in {match.group(0)}")
+        return "" if value is None else str(value)
+
+    @action_handler("click")
+    def do_click(self, step):
+        params = step.params
+        pyautogui.click(params["x"], params["y"], button=params["button"])
+
+    @action_handler("mouse_move")
+    def do_mouse_move(self, step):
+        params = step.params
+        pyautogui.moveTo(params["x"], params["y"], duration=params["duration"])
+
+    @action_handler("key")
+    def do_key(self, step):
+        try:
+            pyautogui.press(step.params["key"])
+        except:
+            pyautogui.write(step.params["key"])
+
+    @action_handler("type_text")
+    def do_type_text(self, step):
+        pyautogui.write(step.params["text"], interval=step.params["interval"])
+
+    @action_handler("wait")
+    def do_wait(self, step):
+        wait_time = step.params["duration"]
+        self.report(f"Waiting {wait_time} seconds...")
+        self.sleep(wait_time)
+
+    @action_handler("screenshot")
+    def do_screenshot(self, step):
+        screenshot = pyautogui.screenshot()
+        screenshot.save("temp_screenshot.png")
+        self.sink.on_screenshot("temp_screenshot.png")
+
+    def find_on_screen(self, step):
+        """Match the step's template against its search region once; returns a Match or None"""
+        params = step.params
+        region = tuple(params["region"])
+        screen = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
+        origin = region[:2] if region else (0, 0)
+        return vision.locate(params["template"], screen, params["confidence"], params["scales"], origin)
+
+    def wait_for_image(self, step):
+        """Look for the step's template for up to its timeout; returns a Match or None"""
+        deadline = time.monotonic() + step.params["timeout"]
+        while True:
+            match = self.find_on_screen(step)
+            if match is not None or time.monotonic() >= deadline:
+                return match
+            self.retries += 1
+            self.sleep(IMAGE_POLL_INTERVAL)
+
+    @action_handler("find_image")
+    def do_find_image(self, step):
+        match = self.find_on_screen(step)
+        var_name = step.params["variable"]
+        self.variables[var_name] = match.to_dict() if match else ""
+        if match:
+            self.report(f"Found image at ({match.x}, {match.y}), score {match.score:.2f}")
+        else:
+            self.report(f"Image not found: {step.params['template']}")
+
+    @action_handler("wait_for_image")
+    def do_wait_for_image(self, step):
+        match = self.wait_for_image(step)
+        if match is None:
+            raise ValueError(f"Image did not appear within {step.params['timeout']}s: {step.params['template']}")
+        self.variables[step.params["variable"]] = match.to_dict()
+        self.report(f"Image appeared at ({match.x}, {match.y})")
+
+    @action_handler("click_image")
+    def do_click_image(self, step):
+        match = self.wait_for_image(step)
+        if match is None:
+            raise ValueError(f"Image to click not found within {step.params['timeout']}s: {step.params['template']}")
+        pyautogui.click(match.x, match.y, button=step.params["button"])
+        self.report(f"Clicked image at ({match.x}, {match.y})")
+
+    @action_handler("if_condition")
+    def do_if_condition(self, step):
+        # Simple condition evaluation (can be expanded)
+        # For safety, we'll skip complex evaluation
+        self.report(f"Condition check: {step.params['condition']}")
+
+    @action_handler("loop")
+    def do_loop(self, step):
+        iterations = step.params["iterations"]
+        self.report(f"Starting loop: {iterations} iterations")
+        self.run_plan(step.children, iterations)
+
+    @action_handler("for_each_row")
+    def do_for_each_row(self, step):
+        """Run the nested actions once per row of a CSV/Excel file or DataFrame.
+
+        Each row is bound as a dict to row_variable. With a checkpoint
+        file, the index of the next row is saved every batch_size rows (and
+        when the run stops) so a later run resumes there; the checkpoint is
+        removed once all rows are done. With a result file, the row plus the
+        result variables are appended to it as CSV in batches of batch_size.
+        """
+        rows = self.bind_rows(step)
+        try:
+            for _ in rows:
+                self.run_plan(step.children)
+        finally:
+            rows.close()
+
+    def bind_rows(self, step):
+        """Generator behind for_each_row; yields once per row, bound to row_variable.
+
+        Results and checkpoints are recorded when the caller resumes it
+        after running the nested actions. Close it if they fail, so work
+        done so far is saved.
+        """
+        params = step.params
+        file_path = params["file_path"]
+        data_var = params["data_variable"]
+        source = file_path or data_var
+        checkpoint = Path(params["checkpoint_file"]) if params["checkpoint_file"] else None
+        batch_size = max(1, int(params["batch_size"]))
+
+        start = int(params["start_row"])
+        if checkpoint and checkpoint.exists():
+            with open(checkpoint, 'r') as f:
+                saved = json.load(f)
+            if saved.get("source") == source:
+                start = saved.get("next_row", start)
+                self.report(f"Resuming at row {start + 1} from checkpoint")
+
+        if file_path:
+            rows = stream_rows(file_path, params["sheet_name"], start)
+        elif data_var in self.variables:
+            rows = iter_data_rows(self.variables[data_var], start)
+        else:
+            self.report(f"Variable not found: {data_var}")
+            return
+
+        results = []
+        next_row = start
+
+        def commit():
+            if results:
+                result_file = Path(params["result_file"])
+                pd.DataFrame(results).to_csv(
+                    result_file, mode='a', header=not result_file.exists(), index=False
+                )
+                results.clear()
+            if checkpoint:
+                write_json_atomic(checkpoint, {"source": source, "next_row": next_row})
+
+        try:
+            for row in rows:
+                self.variables[params["row_variable"]] = row
+                self.report(f"Processing row {next_row + 1}")
+                yield row
+                next_row += 1
+                if params["result_file"]:
+                    record = dict(row)
+                    for name in params["result_variables"]:
+                        record[name] = self.variables.get(name, "")
+                    results.append(record)
+                if (next_row - start) % batch_size == 0:
+                    commit()
+        finally:
+            rows.close()
+            commit()
+        if checkpoint:
+            checkpoint.unlink(missing_ok=True)
+        self.report(f"Processed {next_row - start} rows from {source}")
+
+    @action_handler("web_navigate")
+    def do_web_navigate(self, step):
+        self.setup_selenium()
+        if self.driver:
+            url = step.params["url"]
+            self.report(f"Navigating to {url}")
+            self.visited_origins.add(url_origin(url))
+            self.driver.get(url)
+
+    def wait_for_element(self, step, condition):
+        """Poll up to ELEMENT_TIMEOUT seconds for the step's element, or return None"""
+        # Polled here rather than with WebDriverWait so cancel() can interrupt
+        params = step.params
+        locate = condition((params["by"], params["selector"]))
+        deadline = time.monotonic() + ELEMENT_TIMEOUT
+        while True:
+            try:
+                element = locate(self.driver)
+            except selenium_exceptions.NoSuchElementException:
+                element = None
+            if element:
+                return element
+            if time.monotonic() >= deadline:
+                self.report(f"Element not found: {params['selector']}")
+                return None
+            self.retries += 1
+            self.sleep(ELEMENT_POLL_INTERVAL)
+
+    @action_handler("web_click")
+    def do_web_click(self, step):
+        if self.driver:
+            element = self.wait_for_element(step, EC.element_to_be_clickable)
+            if element is not None:
+                element.click()
+                self.report(f"Clicked element: {step.params['selector']}")
+
+    @action_handler("web_type")
+    def do_web_type(self, step):
+        if self.driver:
+            element = self.wait_for_element(step, EC.presence_of_element_located)
+            if element is not None:
+                element.clear()
+                element.send_keys(step.params["text"])
+                self.report(f"Typed into element: {step.params['selector']}")
+
+    @action_handler("web_extract")
+    def do_web_extract(self, step):
+        if self.driver:
+            element = self.wait_for_element(step, EC.presence_of_element_located)
+            if element is not None:
+                var_name = step.params["variable"]
+                self.variables[var_name] = element.text
+                self.report(f"Extracted data to variable: {var_name}")
+
+    @action_handler("excel_read")
+    def do_excel_read(self, step):
+        params = step.params
+        file_path = params["file_path"]
+        options = {
+            "sheet_name": params["sheet_name"],
+            "usecols": params["usecols"] or None,
+            "header_row": params["header_row"],
+            "start_row": params["start_row"],
+            "max_rows": params["max_rows"],
+            "read_only": params["read_only"]
+        }
+        try:
+            # Make pending writes to this file from this run visible first
+            self.flush_excel_sessions(file_path)
+            if params["cache"]:
+                df, cached = cached_excel_read(file_path, **options)
+            else:
+                df, cached = read_excel_sheet(file_path, **options), False
+            self.variables[params["variable"]] = df
+            source = " (cached)" if cached else ""
+            self.report(f"Read Excel file{source}: {file_path}")
+        except Exception as e:
+            self.report(f"Error reading Excel: {str(e)}")
+
+    @action_handler("excel_write")
+    def do_excel_write(self, step):
+        params = step.params
+        file_path = params["file_path"]
+        data_var = params["data_variable"]
+        if data_var in self.variables:
+            try:
+                session = self.excel_session(file_path, fresh=params["mode"] == "new_workbook")
+                rows = session.write(self.variables[data_var], params["sheet_name"], params["mode"])
+                self.report(
+                    f"Wrote {rows} rows to sheet '{params['sheet_name'] or 'Sheet1'}' of {file_path}"
+                )
+            except Exception as e:
+                self.report(f"Error writing Excel: {str(e)}")
+        else:
+            self.report(f"Variable not found: {data_var}")
+
+    def excel_session(self, file_path, fresh=False):
+        """Open writer session for file_path, created on first use in this run"""
+        key = str(Path(file_path).resolve())
+        session = self.excel_sessions.get(key)
+        if session is None:
+            session = ExcelWriterSession(file_path, fresh)
+            self.excel_sessions[key] = session
+        return session
+
+    def flush_excel_sessions(self, file_path=None):
+        """Save open Excel outputs (all, or only file_path) to disk"""
+        if file_path is None:
+            keys = list(self.excel_sessions)
+        else:
+            keys = [key for key in [str(Path(file_path).resolve())] if key in self.excel_sessions]
+        for key in keys:
+            session = self.excel_sessions.pop(key)
+            try:
+                session.save()
+                self.report(
+                    f"Saved Excel file: {session.file_path} ({session.rows_written} rows written)"
+                )
+            except Exception as e:
+                self.report(f"Error saving Excel: {str(e)}")
+
+    @action_handler("csv_read")
+    def do_csv_read(self, step):
+        params = step.params
+        file_path = params["file_path"]
+        read_options = {
+            "usecols": params["usecols"] or None,
+            "dtype": params["dtype"] or None
+        }
+        try:
+            if params["chunk_size"]:
+                # Check the file and columns now rather than on first use
+                pd.read_csv(file_path, nrows=0, usecols=read_options["usecols"])
+                self.variables[params["variable"]] = ChunkedCSV(file_path, params["chunk_size"], **read_options)
+                self.report(f"Opened CSV file in chunks of {params['chunk_size']} rows: {file_path}")
+            else:
+                df = pd.read_csv(file_path, **read_options)
+                self.variables[params["variable"]] = df
+                self.report(f"Read CSV file: {file_path}")
+        except Exception as e:
+            self.report(f"Error reading CSV: {str(e)}")
+
+    @action_handler("csv_write")
+    def do_csv_write(self, step):
+        params = step.params
+        file_path = params["file_path"]
+        data_var = params["data_variable"]
+        if data_var in self.variables:
+            try:
+                df = self.variables[data_var]
+                append = params["mode"] == "append"
+                # An appended file only gets a header if it is new or empty
+                header = not (append and os.path.exists(file_path) and os.path.getsize(file_path) > 0)
+                chunks = df if isinstance(df, ChunkedCSV) else [df]
+                for chunk in chunks:
+                    chunk.to_csv(file_path, mode='a' if append else 'w', header=header, index=False)
+                    append, header = True, False
+                verb = "Appended to" if params["mode"] == "append" else "Wrote"
+                self.report(f"{verb} CSV file: {file_path}")
+            except Exception as e:
+                self.report(f"Error writing CSV: {str(e)}")
+        else:
+            self.report(f"Variable not found: {data_var}")
+                
+    def setup_selenium(self):
+        """Borrow a Selenium WebDriver from the pool"""
+        if not self.driver:
+            try:
+                self.driver = DRIVER_POOL.acquire(self.headless)
+            except Exception as e:
+                self.report(f"Could not start browser: {str(e)}")
+                
+    def cleanup_selenium(self):
+        """Return the Selenium WebDriver to the pool"""
+        if self.driver:
+            DRIVER_POOL.release(self.driver, self.headless, self.visited_origins)
+            self.driver = None
+            self.visited_origins = set()
@@ -0,0 +1,201 @@
+"""Post-processing for recorded action lists.
+
+The recorder turns every keypress into a "key" step and samples the
+mouse into "mouse_move" steps, and each of those steps costs a pyautogui
+call plus the delay between steps when the workflow runs.
+optimize_recording() rewrites a recording into fewer steps that replay
+the same input:
+
+- runs of printable keys become one "type_text" step, with backspaces
+  typed inside the run applied to its text
+- mouse paths are simplified with Ramer-Douglas-Peucker, keeping only
+  the points where the path turns by more than the tolerance
+- moves to where the next click is, and moves to where the pointer
+  already is, are dropped: click() moves the pointer itself
+- steps that do nothing on replay (Shift pressed on its own, zero
+  waits, empty text) are dropped
+
+Qt-free, like the engine.
+"""
+import math
+
+from rpa_engine import ACTION_DEFAULTS
+
+# Default distance in pixels a mouse path may deviate from its simplified form
+MOVE_TOLERANCE = 3
+
+# Keys whose press and release on their own change nothing
+NOOP_KEYS = {"shift", "shift_l", "shift_r"}
+
+# Key names the recorder stores for keys that type a character
+KEY_CHARS = {"space": " "}
+
+
+def key_char(key):
+    """The character a recorded key types, or None for control keys"""
+    key = KEY_CHARS.get(key, key)
+    if isinstance(key, str) and len(key) == 1 and key.isprintable():
+        return key
+    return None
+
+
+def simplify_path(points, tolerance=MOVE_TOLERANCE):
+    """Indices of the points kept by Ramer-Douglas-Peucker simplification"""
+    if len(points) < 3:
+        return list(range(len(points)))
+    keep = {0, len(points) - 1}
+    # Iterative, so long paths don't hit the recursion limit
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        length = math.hypot(x2 - x1, y2 - y1)
+        farthest, distance = None, tolerance
+        for i in range(first + 1, last):
+            x, y = points[i]
+            if length:
+                d = abs((x2 - x1) * (y1 - y) - (x1 - x) * (y2 - y1)) / length
+            else:
+                d = math.hypot(x - x1, y - y1)
+            if d > distance:
+                farthest, distance = i, d
+        if farthest is not None:
+            keep.add(farthest)
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return sorted(keep)
+
+
+def step_time(action, delay=0.5):
+    """Seconds an action takes on replay, not counting the delay after it"""
+    action_type = action["type"]
+    defaults = ACTION_DEFAULTS.get(action_type, {})
+    if action_type == "mouse_move":
+        return action.get("duration", defaults["duration"])
+    if action_type == "type_text":
+        return len(action.get("text", "")) * action.get("interval", defaults["interval"])
+    if action_type == "wait":
+        return action.get("duration", defaults["duration"])
+    if action_type == "loop":
+        return action.get("iterations", 1) * estimate_replay_time(action.get("actions", []), delay)
+    return 0.0
+
+
+def estimate_replay_time(actions, delay=0.5):
+    """Rough replay time of actions with delay seconds between steps"""
+    return sum(step_time(action, delay) + delay for action in actions)
+
+
+def count_steps(actions):
+    """Number of actions, including those nested in loops"""
+    return sum(1 + count_steps(action.get("actions", [])) for action in actions)
+
+
+class RecordingOptimizer:
+    """One pass of optimize_recording(); counts what it changed in stats"""
+
+    def __init__(self, tolerance=MOVE_TOLERANCE):
+        self.tolerance = tolerance
+        self.stats = {"keys_merged": 0, "moves_removed": 0, "noops_removed": 0}
+
+    def optimize(self, actions):
+        actions = self.merge_keys(actions)
+        actions = self.simplify_moves(actions)
+        for i, action in enumerate(actions):
+            if action.get("actions"):
+                actions[i] = dict(action, actions=self.optimize(action["actions"]))
+        return actions
+
+    def is_noop(self, action):
+        action_type = action["type"]
+        if action_type == "key":
+            return action.get("key") in NOOP_KEYS
+        if action_type == "type_text":
+            return not action.get("text")
+        if action_type == "wait":
+            return not action.get("duration", ACTION_DEFAULTS["wait"]["duration"])
+        return False
+
+    def merge_keys(self, actions):
+        """Replace runs of printable key steps with type_text steps"""
+        merged = []
+        run = None
+        for action in actions:
+            if self.is_noop(action):
+                self.stats["noops_removed"] += 1
+                continue
+            if action["type"] == "key":
+                char = key_char(action.get("key"))
+                if char is not None:
+                    if run is None:
+                        run = {"type": "type_text", "text": "", "timestamp": action.get("timestamp")}
+                        merged.append(run)
+                    run["text"] += char
+                    self.stats["keys_merged"] += 1
+                    continue
+                if action.get("key") == "backspace" and run is not None and run["text"]:
+                    run["text"] = run["text"][:-1]
+                    self.stats["keys_merged"] += 1
+                    continue
+            run = None
+            merged.append(action)
+        # A run whose keys were all erased again types nothing
+        kept = [action for action in merged if not self.is_noop(action)]
+        self.stats["noops_removed"] += len(merged) - len(kept)
+        return kept
+
+    def simplify_moves(self, actions):
+        """Simplify runs of mouse_move steps and drop redundant ones"""
+        simplified = []
+        position = None
+        i = 0
+        while i < len(actions):
+            if actions[i]["type"] != "mouse_move":
+                action = actions[i]
+                if action["type"] == "click":
+                    position = (action["x"], action["y"])
+                simplified.append(action)
+                i += 1
+                continue
+
+            end = i
+            while end < len(actions) and actions[end]["type"] == "mouse_move":
+                end += 1
+            run = actions[i:end]
+            points = [(move["x"], move["y"]) for move in run]
+            kept = [run[k] for k in simplify_path(points, self.tolerance)]
+
+            following = actions[end] if end < len(actions) else None
+            if following is not None and following["type"] == "click" and \
+                    self.near((kept[-1]["x"], kept[-1]["y"]), (following["x"], following["y"])):
+                kept.pop()
+            if kept and position is not None and self.near((kept[0]["x"], kept[0]["y"]), position):
+                kept.pop(0)
+
+            self.stats["moves_removed"] += len(run) - len(kept)
+            simplified.extend(kept)
+            if kept:
+                position = (kept[-1]["x"], kept[-1]["y"])
+            i = end
+        return simplified
+
+    def near(self, a, b):
+        return math.hypot(a[0] - b[0], a[1] - b[1]) <= self.tolerance
+
+
+def optimize_recording(actions, delay=0.5, tolerance=MOVE_TOLERANCE):
+    """Return (optimized actions, stats) for a recorded action list.
+
+    actions is not modified. stats has the step counts before and after,
+    what was merged or removed, and the estimated replay time saved with
+    delay seconds between steps.
+    """
+    optimizer = RecordingOptimizer(tolerance)
+    optimized = optimizer.optimize(list(actions))
+    stats = {
+        "steps_before": count_steps(actions),
+        "steps_after": count_steps(optimized),
+        **optimizer.stats,
+        "time_saved": estimate_replay_time(actions, delay) - estimate_replay_time(optimized, delay)
+    }
+    return optimized, stats
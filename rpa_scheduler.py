@@ -0,0 +1,508 @@
+"""Run saved workflows on a schedule.
+
+Jobs run a workflow on a cron expression or a fixed interval. Jobs,
+queued runs and run history are kept in an SQLite database, so schedules
+and runs that were waiting for a slot survive a restart. Runs are limited
+per resource class: workflows with desktop actions share a single
+"desktop" slot (they all drive the same mouse and keyboard), web/data-only
+workflows share web_slots "web" slots.
+
+    python rpa_scheduler.py add "Daily export" --cron "0 6 * * 1-5"
+    python rpa_scheduler.py add "Poll orders" --every 300 --headless
+    python rpa_scheduler.py list
+    python rpa_scheduler.py run --web-slots 4
+    python rpa_scheduler.py history --limit 20
+
+A job whose time passed more than MISFIRE_GRACE seconds before the
+scheduler saw it (typically because the scheduler wasn't running) has
+misfired. The job's misfire policy decides what happens: "run_once" runs
+it once now however many times it was missed, "skip" records the run as
+missed and waits for the next time. Runs that are queued waiting for a
+slot stay queued.
+"""
+import argparse
+import json
+import logging
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from rpa_engine import ExecutionEngine, LoggingSink, DRIVER_POOL, is_web_only
+from rpa_cli import default_library, load_workflow, parse_variables
+
+DEFAULT_DB = "scheduler.db"
+
+# Seconds a run may start late before it counts as misfired
+MISFIRE_GRACE = 60
+MISFIRE_POLICIES = ("run_once", "skip")
+
+# Longest the scheduler sleeps before looking for due jobs again
+TICK_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    trigger TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    misfire TEXT NOT NULL DEFAULT 'run_once',
+    next_run REAL NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    job_id INTEGER NOT NULL,
+    workflow TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    status TEXT NOT NULL,
+    scheduled REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    duration REAL,
+    message TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS runs_by_status ON runs (status, scheduled);
+CREATE INDEX IF NOT EXISTS runs_by_job ON runs (job_id, id);
+"""
+
+# (name, lowest, highest) of each cron field; weekday 7 is Sunday like 0
+CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7)
+)
+
+
+def parse_cron_field(field, name, low, high):
+    """Set of values matched by one cron field, e.g. "*/15" or "1-5,7" """
+    values = set()
+    for part in field.split(","):
+        span, slash, step = part.partition("/")
+        try:
+            step = int(step) if slash else 1
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(value) for value in span.split("-", 1))
+            else:
+                start = int(span)
+                end = high if slash else start
+        except ValueError:
+            raise ValueError(f"Invalid cron {name} field: '{field}'")
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid cron {name} field: '{field}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronTrigger:
+    """Five-field cron expression: minute hour day month weekday.
+
+    Fields take *, numbers, a-b ranges, comma lists and /step. As in
+    cron, when both day and weekday are restricted a day matching either
+    one counts. Times are local.
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"Cron expression needs 5 fields, got '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            parse_cron_field(field, *spec) for field, spec in zip(fields, CRON_FIELDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches_day(self, moment):
+        day = moment.day in self.days
+        weekday = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, timestamp):
+        """First matching minute strictly after timestamp"""
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Every valid expression matches within a leap-year cycle
+        limit = moment + timedelta(days=366 * 4)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.matches_day(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+
+class IntervalTrigger:
+    """Every spec seconds"""
+
+    def __init__(self, spec):
+        self.seconds = float(spec)
+        if self.seconds <= 0:
+            raise ValueError(f"Interval must be positive, got {spec}")
+
+    def next_after(self, timestamp):
+        return timestamp + self.seconds
+
+
+TRIGGERS = {
+    "cron": CronTrigger,
+    "interval": IntervalTrigger
+}
+
+
+def make_trigger(trigger, spec):
+    if trigger not in TRIGGERS:
+        raise ValueError(f"Unknown trigger type '{trigger}'")
+    return TRIGGERS[trigger](spec)
+
+
+def resource_class(workflow):
+    """Slot a workflow's runs take: "desktop" if it uses mouse/keyboard, else "web" """
+    return "web" if is_web_only(workflow.get("actions", [])) else "desktop"
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else "-"
+
+
+class JobStore:
+    """SQLite tables of jobs and their runs.
+
+    A run row is created "queued" when its job falls due and moves to
+    "running" and then "success", "failed" or "cancelled"; runs skipped
+    by the misfire policy are stored as "missed", and runs a previous
+    scheduler process didn't finish as "interrupted". One connection is
+    shared by the scheduler's threads, behind a lock.
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.executescript(SCHEMA)
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return [dict(row) for row in self.db.execute(sql, params)]
+
+    def execute(self, sql, params=()):
+        with self.lock, self.db:
+            return self.db.execute(sql, params).lastrowid
+
+    def add_job(self, workflow, trigger, spec, options=None, misfire="run_once", now=None):
+        """Add a job, first due at the trigger's next time; returns its id"""
+        if misfire not in MISFIRE_POLICIES:
+            raise ValueError(f"Misfire policy must be one of {', '.join(MISFIRE_POLICIES)}")
+        now = time.time() if now is None else now
+        next_run = make_trigger(trigger, spec).next_after(now)
+        return self.execute(
+            "INSERT INTO jobs (workflow, trigger, spec, options, misfire, next_run, created) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (workflow, trigger, str(spec), json.dumps(options or {}), misfire, next_run, now)
+        )
+
+    def remove_job(self, job_id):
+        """Delete a job and its queued runs; history is kept"""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM runs WHERE job_id = ? AND status = 'queued'", (job_id,))
+            return self.db.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount > 0
+
+    def jobs(self):
+        return self.query("SELECT * FROM jobs ORDER BY id")
+
+    def job(self, job_id):
+        rows = self.query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def due_jobs(self, now):
+        return self.query("SELECT * FROM jobs WHERE next_run <= ? ORDER BY next_run", (now,))
+
+    def set_next_run(self, job_id, next_run):
+        self.execute("UPDATE jobs SET next_run = ? WHERE id = ?", (next_run, job_id))
+
+    def has_queued_run(self, job_id):
+        return bool(self.query("SELECT 1 FROM runs WHERE job_id = ? AND status = 'queued' LIMIT 1", (job_id,)))
+
+    def add_run(self, job, resource, status, scheduled, message=""):
+        return self.execute(
+            "INSERT INTO runs (job_id, workflow, resource, status, scheduled, message) VALUES (?, ?, ?, ?, ?, ?)",
+            (job["id"], job["workflow"], resource, status, scheduled, message)
+        )
+
+    def queued_runs(self):
+        return self.query("SELECT * FROM runs WHERE status = 'queued' ORDER BY scheduled, id")
+
+    def start_run(self, run_id, started):
+        self.execute("UPDATE runs SET status = 'running', started = ? WHERE id = ?", (started, run_id))
+
+    def finish_run(self, run_id, status, finished, duration, message):
+        self.execute(
+            "UPDATE runs SET status = ?, finished = ?, duration = ?, message = ? WHERE id = ?",
+            (status, finished, duration, message, run_id)
+        )
+
+    def interrupt_running(self, now):
+        """Close runs left "running" by a scheduler that stopped; returns how many"""
+        with self.lock, self.db:
+            return self.db.execute(
+                "UPDATE runs SET status = 'interrupted', finished = ?, message = 'Scheduler stopped during the run' "
+                "WHERE status = 'running'",
+                (now,)
+            ).rowcount
+
+    def history(self, job_id=None, limit=50):
+        if job_id is None:
+            return self.query("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))
+        return self.query("SELECT * FROM runs WHERE job_id = ? ORDER BY id DESC LIMIT ?", (job_id, limit))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class Scheduler:
+    """Queues due jobs and runs them in threads, within the slot limits.
+
+    A job never runs twice at once: its next run waits in the queue until
+    the previous one has finished.
+
+    run_forever() blocks until stop() is called from another thread or a
+    signal handler. tick() does one round of queueing and dispatching and
+    can drive the scheduler from an existing loop instead.
+    """
+
+    def __init__(self, store, library=None, web_slots=4, grace=MISFIRE_GRACE, logger=None):
+        self.store = store
+        self.library = library or default_library()
+        self.slots = {"desktop": 1, "web": web_slots}
+        self.grace = grace
+        self.logger = logger or logging.getLogger("rpa.scheduler")
+        # run id -> (engine or None while loading, thread, resource, job id)
+        self.running = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = False
+
+    def run_forever(self):
+        interrupted = self.store.interrupt_running(time.time())
+        if interrupted:
+            self.logger.warning("Marked %d unfinished runs from a previous scheduler as interrupted", interrupted)
+        self.logger.info("Scheduler started: %d desktop slot, %d web slots", self.slots["desktop"], self.slots["web"])
+        while not self.stopping:
+            self.tick()
+            self.wakeup.wait(TICK_INTERVAL)
+            self.wakeup.clear()
+        self.finish()
+
+    def tick(self, now=None):
+        now = time.time() if now is None else now
+        self.queue_due_jobs(now)
+        self.dispatch()
+
+    def queue_due_jobs(self, now):
+        """Queue a run for every due job, applying its misfire policy"""
+        for job in self.store.due_jobs(now):
+            scheduled = job["next_run"]
+            trigger = make_trigger(job["trigger"], job["spec"])
+            next_run = trigger.next_after(scheduled)
+            if next_run <= now:
+                # Missed more than once; the next run is in the future
+                next_run = trigger.next_after(now)
+            self.store.set_next_run(job["id"], next_run)
+
+            try:
+                resource = resource_class(load_workflow(job["workflow"], self.library))
+            except (OSError, ValueError) as e:
+                self.store.add_run(job, "", "failed", scheduled, f"Error: {e}")
+                self.logger.error("Job %d: %s", job["id"], e)
+                continue
+            late = now - scheduled
+            if late > self.grace and job["misfire"] == "skip":
+                self.store.add_run(job, resource, "missed", scheduled, f"Missed by {late:.0f}s")
+                self.logger.warning("Job %d: skipped run due %s", job["id"], format_time(scheduled))
+            elif self.store.has_queued_run(job["id"]):
+                # Still waiting for a slot; one queued run covers both
+                self.logger.debug("Job %d: already queued", job["id"])
+            else:
+                self.store.add_run(job, resource, "queued", scheduled)
+
+    def dispatch(self):
+        """Start queued runs, oldest first, while their resource class has a free slot"""
+        with self.lock:
+            busy = Counter(resource for _, _, resource, _ in self.running.values())
+            busy_jobs = {job_id for _, _, _, job_id in self.running.values()}
+        for run in self.store.queued_runs():
+            if self.stopping:
+                return
+            resource = run["resource"]
+            if busy[resource] >= self.slots.get(resource, 1) or run["job_id"] in busy_jobs:
+                continue
+            busy[resource] += 1
+            busy_jobs.add(run["job_id"])
+            self.store.start_run(run["id"], time.time())
+            thread = threading.Thread(target=self.execute, args=(run,), name=f"rpa-run-{run['id']}", daemon=True)
+            with self.lock:
+                self.running[run["id"]] = (None, thread, resource, run["job_id"])
+            thread.start()
+
+    def execute(self, run):
+        """Run one queued run to completion and record the result"""
+        job = self.store.job(run["job_id"])
+        options = json.loads(job["options"]) if job else {}
+        started = time.monotonic()
+        engine = None
+        try:
+            workflow = load_workflow(run["workflow"], self.library)
+            engine = ExecutionEngine(
+                workflow,
+                options.get("delay", 0.5),
+                options.get("adaptive_pacing", True),
+                options.get("headless", False),
+                options.get("variables"),
+                sink=LoggingSink(self.logger.getChild(f"run{run['id']}"))
+            )
+            with self.lock:
+                self.running[run["id"]] = (engine,) + self.running[run["id"]][1:]
+                if self.stopping:
+                    engine.cancel()
+            success, message = engine.run()
+            status = "cancelled" if engine.cancelled else "success" if success else "failed"
+        except Exception as e:
+            status, message = "failed", f"Error: {str(e)}"
+        duration = time.monotonic() - started
+        self.store.finish_run(run["id"], status, time.time(), duration, message)
+        self.logger.info("Run %d of '%s': %s in %.1fs", run["id"], run["workflow"], status, duration)
+        with self.lock:
+            del self.running[run["id"]]
+        self.wakeup.set()
+
+    def stop(self):
+        """Stop dispatching and cancel running workflows; safe from any thread"""
+        self.stopping = True
+        with self.lock:
+            for engine, _, _, _ in self.running.values():
+                if engine is not None:
+                    engine.cancel()
+        self.wakeup.set()
+
+    def finish(self):
+        """Wait for cancelled runs to record their results, then release browsers"""
+        with self.lock:
+            threads = [thread for _, thread, _, _ in self.running.values()]
+        for thread in threads:
+            thread.join()
+        DRIVER_POOL.shutdown()
+        self.logger.info("Scheduler stopped")
+
+
+def print_jobs(store):
+    for job in store.jobs():
+        every = f"every {job['spec']}s" if job["trigger"] == "interval" else f"cron '{job['spec']}'"
+        print(f"{job['id']:>4}  {job['workflow']}  {every}  next {format_time(job['next_run'])}  "
+              f"misfire={job['misfire']}")
+
+
+def print_history(store, job_id, limit):
+    for run in store.history(job_id, limit):
+        duration = f"{run['duration']:.1f}s" if run["duration"] is not None else "-"
+        print(f"{run['id']:>5}  job {run['job_id']:>3}  {run['workflow']}  {run['status']:<11}  "
+              f"due {format_time(run['scheduled'])}  started {format_time(run['started'])}  "
+              f"{duration:>8}  {run['message']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schedule saved RPA workflows.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"scheduler database (default: {DEFAULT_DB})")
+    parser.add_argument("--library", default=None,
+                        help="workflow store directory or workflows.json (default: the GUI's library)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="schedule a workflow")
+    add.add_argument("workflow", help="workflow name, or path to an exported workflow .json file")
+    when = add.add_mutually_exclusive_group(required=True)
+    when.add_argument("--cron", help="cron expression: minute hour day month weekday")
+    when.add_argument("--every", type=float, metavar="SECONDS", help="run at a fixed interval")
+    add.add_argument("--misfire", choices=MISFIRE_POLICIES, default="run_once",
+                     help="what to do with a run that is more than a minute late")
+    add.add_argument("--delay", type=float, default=0.5, help="maximum delay between actions in seconds")
+    add.add_argument("--fixed-delay", action="store_true", help="always wait the full delay (no adaptive pacing)")
+    add.add_argument("--headless", action="store_true", help="run the browser without a window")
+    add.add_argument("--var", action="append", default=[], metavar="NAME=VALUE",
+                     help="set a variable before each run (repeatable)")
+    add.add_argument("--vars-file", help="JSON object of variables to set before each run")
+
+    commands.add_parser("list", help="list scheduled jobs")
+
+    remove = commands.add_parser("remove", help="delete a job")
+    remove.add_argument("job_id", type=int)
+
+    history = commands.add_parser("history", help="show recent runs")
+    history.add_argument("--job", type=int, default=None, help="only runs of this job")
+    history.add_argument("--limit", type=int, default=50)
+
+    run = commands.add_parser("run", help="run the scheduler until interrupted")
+    run.add_argument("--web-slots", type=int, default=4, help="web/data workflows that may run at once")
+    run.add_argument("--grace", type=float, default=MISFIRE_GRACE,
+                     help="seconds a run may start late before its misfire policy applies")
+
+    args = parser.parse_args(argv)
+    library = args.library or default_library()
+    store = JobStore(args.db)
+
+    try:
+        if args.command == "add":
+            # Fail now rather than at the first run
+            load_workflow(args.workflow, library)
+            options = {
+                "delay": args.delay,
+                "adaptive_pacing": not args.fixed_delay,
+                "headless": args.headless,
+                "variables": parse_variables(args)
+            }
+            trigger, spec = ("cron", args.cron) if args.cron else ("interval", args.every)
+            job_id = store.add_job(args.workflow, trigger, spec, options, args.misfire)
+            print(f"Added job {job_id}, next run {format_time(store.job(job_id)['next_run'])}")
+        elif args.command == "list":
+            print_jobs(store)
+        elif args.command == "remove":
+            if not store.remove_job(args.job_id):
+                print(f"Error: no job {args.job_id}", file=sys.stderr)
+                return 2
+        elif args.command == "history":
+            print_history(store, args.job, args.limit)
+        elif args.command == "run":
+            logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+            scheduler = Scheduler(store, library, args.web_slots, args.grace)
+            signal.signal(signal.SIGINT, lambda signum, frame: scheduler.stop())
+            signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+            scheduler.run_forever()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
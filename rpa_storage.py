@@ -0,0 +1,210 @@
+"""Storage for workflows and the binary data they refer to.
+
+Qt-free, shared by the GUI and the command-line runner.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temporary file and rename it over path"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class BlobStore:
+    """Content-addressed file store for binary data such as screenshots.
+
+    Blobs are named by the SHA-256 of their content, so identical data is
+    stored once and workflows only keep the hash. Files live in
+    root/<first two hex digits>/<hash><suffix>.
+    """
+
+    def __init__(self, root, suffix=".png"):
+        self.root = Path(root)
+        self.suffix = suffix
+
+    def path(self, ref):
+        return self.root / ref[:2] / f"{ref}{self.suffix}"
+
+    def put(self, data):
+        """Store bytes and return their reference"""
+        ref = hashlib.sha256(data).hexdigest()
+        path = self.path(ref)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return ref
+
+    def get(self, ref):
+        return self.path(ref).read_bytes()
+
+    def exists(self, ref):
+        return self.path(ref).exists()
+
+    def collect_garbage(self, referenced, grace=300):
+        """Delete blobs not in referenced; returns how many were removed.
+
+        Blobs younger than grace seconds are kept, since a recording may
+        have stored one that isn't part of any action list yet.
+        """
+        removed = 0
+        cutoff = time.time() - grace
+        for path in self.root.glob(f"*/*{self.suffix}"):
+            if path.stem not in referenced and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+def screenshot_refs(actions, refs=None):
+    """Set of blob references used by actions, including nested ones"""
+    refs = set() if refs is None else refs
+    for action in actions:
+        if action.get("screenshot_blob"):
+            refs.add(action["screenshot_blob"])
+        screenshot_refs(action.get("actions", []), refs)
+    return refs
+
+
+def externalize_screenshots(actions, store):
+    """Move inline base64 screenshots into the blob store; returns how many moved"""
+    moved = 0
+    for action in actions:
+        if isinstance(action.get("screenshot"), str):
+            action["screenshot_blob"] = store.put(base64.b64decode(action.pop("screenshot")))
+            moved += 1
+        moved += externalize_screenshots(action.get("actions", []), store)
+    return moved
+
+
+def inline_screenshots(actions, store):
+    """Copy of actions with blob screenshots embedded as base64, for export"""
+    inlined = []
+    for action in actions:
+        action = dict(action)
+        ref = action.get("screenshot_blob")
+        if ref and store.exists(ref):
+            del action["screenshot_blob"]
+            action["screenshot"] = base64.b64encode(store.get(ref)).decode()
+        if "actions" in action:
+            action["actions"] = inline_screenshots(action["actions"], store)
+        inlined.append(action)
+    return inlined
+
+
+def count_action_types(actions):
+    """Number of top-level actions of each type, most common first"""
+    counts = {}
+    for action in actions:
+        counts[action["type"]] = counts.get(action["type"], 0) + 1
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+BLOB_STORE = BlobStore(Path("workflow_blobs"))
+
+
+class WorkflowStore:
+    """Workflow library stored as one JSON file per workflow.
+
+    index.json holds the id, name, creation time, action count, action
+    counts by type and screenshot blob references of every workflow,
+    which is all the list views, previews and blob garbage collection
+    need. A workflow's
+    actions are only read from its own file when it is opened, and only
+    that file is rewritten when it changes. Writes are atomic, so a crash
+    can't leave a half-written library behind.
+    """
+    INDEX_FIELDS = ("id", "name", "created", "action_count", "action_types", "screenshot_refs")
+    CACHE_SIZE = 8
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.index_file = self.root / "index.json"
+        self.entries = []
+        # Recently opened workflows, least recently used first
+        self.cache = OrderedDict()
+        if self.index_file.exists():
+            with open(self.index_file, 'r') as f:
+                self.entries = json.load(f)
+
+    def exists(self):
+        return self.index_file.exists()
+
+    def list(self):
+        """Index entries of all workflows, in the order they were added"""
+        return list(self.entries)
+
+    def workflow_file(self, workflow_id):
+        return self.root / f"{workflow_id}.json"
+
+    def get(self, workflow_id):
+        """Full workflow, read from disk on first use"""
+        workflow = self.cache.get(workflow_id)
+        if workflow is None:
+            with open(self.workflow_file(workflow_id), 'r') as f:
+                workflow = json.load(f)
+            self.cache[workflow_id] = workflow
+            if len(self.cache) > self.CACHE_SIZE:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(workflow_id)
+        return workflow
+
+    def add(self, workflow):
+        """Store a new workflow and return its index entry"""
+        return self.add_many([workflow])[0]
+
+    def add_many(self, workflows):
+        """Store new workflows, rewriting the index once; returns their index entries"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for workflow in workflows:
+            workflow = dict(workflow, id=uuid.uuid4().hex[:12])
+            workflow["action_count"] = len(workflow["actions"])
+            workflow["action_types"] = count_action_types(workflow["actions"])
+            workflow["screenshot_refs"] = sorted(screenshot_refs(workflow["actions"]))
+            write_json_atomic(self.workflow_file(workflow["id"]), workflow)
+            entries.append({field: workflow.get(field) for field in self.INDEX_FIELDS})
+        self.entries.extend(entries)
+        self.save_index()
+        return entries
+
+    def referenced_blobs(self):
+        """Blob references of all workflows, read from the index"""
+        refs = set()
+        backfilled = False
+        for entry in self.entries:
+            if entry.get("screenshot_refs") is None:
+                # Indexes written by older versions don't list them yet; the
+                # workflow file is read once, bypassing the cache
+                with open(self.workflow_file(entry["id"]), 'r') as f:
+                    entry["screenshot_refs"] = sorted(screenshot_refs(json.load(f)["actions"]))
+                backfilled = True
+            refs.update(entry["screenshot_refs"])
+        if backfilled:
+            self.save_index()
+        return refs
+
+    def delete(self, workflow_id):
+        # Index first: a crash in between leaves an unused file, not a broken entry
+        self.entries = [entry for entry in self.entries if entry["id"] != workflow_id]
+        self.save_index()
+        self.cache.pop(workflow_id, None)
+        self.workflow_file(workflow_id).unlink(missing_ok=True)
+
+    def save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(self.index_file, self.entries)
@@ -0,0 +1,246 @@
+"""Find images on the screen by template matching.
+
+The find_image, click_image and wait_for_image actions look for a
+template - an image file, or the screenshot the recorder took around a
+click - instead of relying on absolute coordinates, so workflows keep
+working when a window moves.
+
+Matching is normalized cross-correlation computed with NumPy FFTs. The
+screen and template are first shrunk by up to MAX_DOWNSCALE and matched
+coarsely; only the best few coarse candidates are then matched at full
+resolution, in small windows around them. If none of them reaches the
+confidence at any scale, the whole region is searched at full
+resolution. Decoded (and scaled, and shrunk) templates are kept in an
+LRU cache, so repeated searches for the same template only pay for the
+screen.
+
+Qt-free, like the engine; NumPy and Pillow are imported on first use.
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from rpa_engine import LazyModule
+from rpa_storage import BLOB_STORE
+
+np = LazyModule("numpy")
+Image = LazyModule("PIL.Image")
+
+# Decoded templates kept in memory, per source, scale and shrink factor
+TEMPLATE_CACHE_SIZE = 64
+
+# Largest shrink factor of the coarse search, and the size in pixels the
+# template's short side is kept above when shrinking
+MAX_DOWNSCALE = 4
+MIN_COARSE_SIZE = 12
+
+# Coarse matches down to confidence - COARSE_SLACK are refined, at most
+# CANDIDATES of them
+COARSE_SLACK = 0.25
+CANDIDATES = 5
+
+
+class Match:
+    """Where a template was found, in screen coordinates"""
+    __slots__ = ("left", "top", "width", "height", "score")
+
+    def __init__(self, left, top, width, height, score):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.score = score
+
+    @property
+    def x(self):
+        return self.left + self.width // 2
+
+    @property
+    def y(self):
+        return self.top + self.height // 2
+
+    def to_dict(self):
+        """Match as stored in a workflow variable"""
+        return {
+            "x": self.x, "y": self.y, "left": self.left, "top": self.top,
+            "width": self.width, "height": self.height, "score": round(self.score, 4)
+        }
+
+
+def resolve_template(template):
+    """Path of a template given as an image file or a blob store reference"""
+    if template and Path(template).is_file():
+        return Path(template)
+    if template and BLOB_STORE.exists(template):
+        return BLOB_STORE.path(template)
+    raise ValueError(f"Template image not found: {template}")
+
+
+def to_gray(image):
+    """Grayscale float array of a PIL image (or a 2-D array, as is)"""
+    if hasattr(image, "convert"):
+        image = image.convert("L")
+    return np.asarray(image, dtype=np.float64)
+
+
+def shrink(array, factor):
+    """Downscale a 2-D array by averaging factor x factor blocks"""
+    if factor == 1:
+        return array
+    height, width = array.shape[0] // factor, array.shape[1] // factor
+    blocks = array[:height * factor, :width * factor].reshape(height, factor, width, factor)
+    return blocks.mean(axis=(1, 3))
+
+
+def window_sums(array, height, width):
+    """Sum of every height x width window of array, by integral image"""
+    integral = np.zeros((array.shape[0] + 1, array.shape[1] + 1))
+    integral[1:, 1:] = array.cumsum(0).cumsum(1)
+    return (integral[height:, width:] - integral[:-height, width:]
+            - integral[height:, :-width] + integral[:-height, :-width])
+
+
+def match_scores(image, template):
+    """Normalized cross-correlation of template at every position inside image.
+
+    Scores are in [-1, 1]; 1 is an exact match up to brightness and
+    contrast. Windows without any contrast score 0.
+    """
+    height, width = template.shape
+    centered = template - template.mean()
+    template_norm = np.sqrt((centered * centered).sum())
+    if template_norm == 0:
+        raise ValueError("Template image is a single flat color and can't be matched")
+
+    shape = image.shape
+    # Circular correlation; positions where the template fits inside are unaffected
+    spectrum = np.fft.rfft2(image) * np.conj(np.fft.rfft2(centered, shape))
+    correlation = np.fft.irfft2(spectrum, shape)[:shape[0] - height + 1, :shape[1] - width + 1]
+
+    sums = window_sums(image, height, width)
+    variance = window_sums(image * image, height, width) - sums * sums / (height * width)
+    norms = np.sqrt(np.maximum(variance, 0)) * template_norm
+    return np.divide(correlation, norms, out=np.zeros_like(correlation), where=norms > template_norm * 1e-3)
+
+
+def best_positions(scores, threshold, count, spacing):
+    """Up to count (row, column, score) peaks of scores above threshold, spacing apart"""
+    scores = scores.copy()
+    peaks = []
+    space_y, space_x = spacing
+    while len(peaks) < count:
+        row, column = np.unravel_index(np.argmax(scores), scores.shape)
+        score = scores[row, column]
+        if score < threshold:
+            break
+        peaks.append((row, column, float(score)))
+        scores[max(0, row - space_y):row + space_y + 1, max(0, column - space_x):column + space_x + 1] = -1
+    return peaks
+
+
+class TemplateCache:
+    """LRU cache of decoded templates, as grayscale arrays.
+
+    Entries are keyed by file, modification time, scale and shrink
+    factor, so an edited template file is decoded again. Shared by all
+    engines and threads.
+    """
+
+    def __init__(self, max_size=TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template, scale=1.0, factor=1):
+        path = resolve_template(template)
+        key = (str(path), path.stat().st_mtime_ns, scale, factor)
+        with self.lock:
+            array = self.entries.get(key)
+            if array is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return array
+            self.misses += 1
+        array = shrink(self.load(path, scale), factor)
+        with self.lock:
+            self.entries[key] = array
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return array
+
+    @staticmethod
+    def load(path, scale):
+        with Image.open(path) as image:
+            if scale != 1.0:
+                size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                image = image.resize(size, Image.BILINEAR)
+            return to_gray(image)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+TEMPLATE_CACHE = TemplateCache()
+
+
+def better(best, match):
+    """The higher scoring of two matches; best may be None"""
+    return match if best is None or match.score > best.score else best
+
+
+def locate(template, screen, confidence=0.9, scales=(1.0,), origin=(0, 0)):
+    """Best match of template in screen, or None if none reaches confidence.
+
+    screen is a PIL image (or grayscale array) of the search region and
+    origin its top-left corner on the screen. Each of scales resizes the
+    template before matching, for screens scaled differently from where
+    it was captured.
+    """
+    screen = to_gray(screen)
+    shrunk = {1: screen}
+    best = None
+    unmatched = []
+    for scale in scales:
+        full = TEMPLATE_CACHE.get(template, scale)
+        height, width = full.shape
+        if height > screen.shape[0] or width > screen.shape[1]:
+            continue
+
+        factor = max(1, min(MAX_DOWNSCALE, min(height, width) // MIN_COARSE_SIZE))
+        if factor == 1:
+            # Too small to shrink; searched at full resolution below
+            unmatched.append(full)
+            continue
+        if factor not in shrunk:
+            shrunk[factor] = shrink(screen, factor)
+        coarse = TEMPLATE_CACHE.get(template, scale, factor)
+        scores = match_scores(shrunk[factor], coarse)
+        peaks = best_positions(scores, confidence - COARSE_SLACK, CANDIDATES,
+                               (coarse.shape[0] // 2, coarse.shape[1] // 2))
+        found = False
+        for row, column, _ in peaks:
+            # Full-resolution search in a window around the coarse hit
+            top = max(0, (row - 1) * factor)
+            left = max(0, (column - 1) * factor)
+            bottom = min(screen.shape[0], (row + 2) * factor + height)
+            right = min(screen.shape[1], (column + 2) * factor + width)
+            dy, dx, score = best_positions(match_scores(screen[top:bottom, left:right], full), -1, 1, (0, 0))[0]
+            best = better(best, Match(origin[0] + left + int(dx), origin[1] + top + int(dy), width, height, score))
+            found = found or score >= confidence
+        if not found:
+            unmatched.append(full)
+
+    for full in unmatched:
+        if best is not None and best.score >= confidence:
+            break
+        # Shrinking loses fine detail (noise-like textures, thin text);
+        # before giving up, search at full resolution
+        row, column, score = best_positions(match_scores(screen, full), -1, 1, (0, 0))[0]
+        best = better(best, Match(origin[0] + int(column), origin[1] + int(row), *full.shape[::-1], score))
+
+    if best is None or best.score < confidence:
+        return None
+    return best